@@ -60,8 +60,8 @@ const AttendanceEditor = ({ classId, date, onBack, navigateTo }) => {
       setLoading(true);
       console.log("Loading attendance data for class:", classId, "date:", currentDate);
       
-      // Load class info with roster
-      const classData = await window.ApiModule.request(`/classes/${classId}/`);
+      // Load class info with roster (seating periods aren't needed here)
+      const classData = await window.ApiModule.request(`/classes/${classId}/?expand=roster`);
       console.log("Class data loaded:", classData);
       setClassInfo(classData);
       
@@ -59,8 +59,9 @@ const ClassEditor = ({ classId, navigateTo }) => {
         setLoading(true);
         setError(null);
         
-        // Fetch class details
-        const response = await window.ApiModule.request(`/classes/${classId}/`, {
+        // Fetch only the editable class fields (no roster / seating periods)
+        const response = await window.ApiModule.request(
+          `/classes/${classId}/?fields=name,subject,grade_level,description,survey_enabled,survey_opens_at,survey_closes_at`, {
           method: 'GET'
         });
         
@@ -40,7 +40,7 @@ const Students = ({ data, navigateTo, apiModule }) => {
   const loadStudents = async () => {
     try {
       setLoading(true);
-      const response = await window.ApiModule.request('/students/');
+      const response = await window.ApiModule.request('/students/?expand=active_classes');
       const studentData = response.results || response;
       setStudents(studentData);
     } catch (error) {
@@ -111,10 +111,15 @@ TEMPLATES = [
 WSGI_APPLICATION = "student_project.wsgi.application"
 
 # Database configuration (SQLite for all environments)
+# IMMEDIATE transactions take SQLite's write lock at BEGIN, so concurrent
+# atomic() blocks queue (up to the busy timeout) instead of failing with
+# "database is locked" when a read lock can't be upgraded. SQLite ignores
+# select_for_update(); this is what serializes e.g. seating period changes.
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
     }
 }
 
@@ -253,6 +258,13 @@ GOOGLE_SCOPES = [
     'https://www.googleapis.com/auth/admin.directory.user.readonly',   # Read Workspace directory (exploration)
 ]
 
+# Seconds a built Google API client is reused per user (0 disables)
+GOOGLE_SERVICE_CACHE_TTL = int(os.environ.get('GOOGLE_SERVICE_CACHE_TTL', 300))
+
+# Seconds course/roster/directory listings are cached per user (0 disables;
+# ?refresh=1 on a listing endpoint always refetches)
+GOOGLE_LISTING_CACHE_TTL = int(os.environ.get('GOOGLE_LISTING_CACHE_TTL', 300))
+
 # Google OAuth configuration for the Flow
 GOOGLE_OAUTH_CONFIG = {
     "web": {
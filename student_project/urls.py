@@ -16,6 +16,7 @@ from students.google_classroom_service import (
     google_courses,
     google_course_students,
     google_import_students,
+    google_import_courses,
     google_directory_cohorts,
     google_directory_students,
     google_import_directory_students,
@@ -96,6 +97,7 @@ urlpatterns = [
     path("api/google/courses/", google_courses, name="google_courses"),
     path("api/google/courses/<str:course_id>/students/", google_course_students, name="google_course_students"),
     path("api/google/import-students/", google_import_students, name="google_import_students"),
+    path("api/google/import-courses/", google_import_courses, name="google_import_courses"),
     path("api/google/test-directory/", google_test_directory, name="google_test_directory"),
     path("api/google/directory-cohorts/", google_directory_cohorts, name="google_directory_cohorts"),
     path("api/google/directory-students/", google_directory_students, name="google_directory_students"),
@@ -24,6 +24,8 @@ skipped entirely so a flaky/partial API response can never archive the whole
 school. The upsert of the (empty) result is a harmless no-op.
 """
 
+import hashlib
+
 from django.db import transaction
 from django.utils import timezone
 
@@ -53,156 +55,392 @@ def sync_directory(user, dry_run=False):
     """
     service = gcs._build_directory_service_for_user(user)
     domain = (user.email or "").split("@")[-1]
+    return apply_directory_sync(_guarded_fetch(service, domain), dry_run=dry_run)
+
+
+def _guarded_fetch(service, domain):
+    """
+    Stream directory users, turning any network / API failure - whether it
+    happens on the first request or on a later page - into
+    :class:`DirectorySyncError`. Nothing is written before the stream is
+    exhausted, so a mid-fetch failure leaves the Student table untouched.
+    """
     try:
-        directory_users = gcs._fetch_domain_users(service, domain)
+        yield from gcs._fetch_domain_users(service, domain)
     except Exception as e:  # network / API failure
         raise DirectorySyncError(f"Failed to fetch the Workspace directory: {e}")
-    return apply_directory_sync(directory_users, dry_run=dry_run)
 
 
-def apply_directory_sync(directory_users, dry_run=False):
+# Rows per bulk_create / bulk_update / archive UPDATE statement.
+WRITE_CHUNK_SIZE = 500
+
+
+def directory_fingerprint(cohort, data):
     """
-    Apply an already-fetched list of raw directory user records to the Student
-    table. Split out from :func:`sync_directory` so tests can drive it with a
-    fixed fixture and no Google calls.
+    Stable hash of the mirrored fields of one normalized directory record.
 
-    Runs inside a single transaction; when ``dry_run`` is true the transaction
-    is rolled back at the end, so the returned counts are exact (real rows are
-    created to reserve unique IDs, then discarded) without persisting anything.
+    Stored on :attr:`Student.directory_fingerprint` whenever the sync writes
+    a row; an active student whose stored fingerprint matches the incoming
+    record needs nothing but a ``synced_at`` bump.
+    """
+    parts = (
+        data["google_user_id"],
+        data["student_id"],
+        data["email"].lower(),
+        data["first_name"],
+        data["last_name"],
+        cohort,
+    )
+    return hashlib.md5("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class _StudentIndex:
     """
-    now = timezone.now()
+    In-memory identity index over every Student (active and archived).
 
-    # Only student-cohort users are mirrored; staff (no two-digit email prefix)
-    # are excluded. Keep the paired (raw email -> normalized) so we can derive
-    # the cohort per row.
-    student_records = []
-    for u in directory_users:
-        cohort = gcs._cohort_prefix(u.get("primaryEmail"))
-        if cohort:
-            student_records.append((cohort, gcs._normalize_directory_user(u)))
+    Mirrors :func:`~students.google_classroom_service._match_existing_student`
+    (google_user_id, then student_id, then email case-insensitively, lowest pk
+    winning each lookup) without a query per directory user. Students created
+    during the run are indexed too, so a later record can match them exactly
+    as it would have matched the freshly inserted row.
+    """
 
-    # "Seen" set for archiving: every google id present anywhere in the fetch
-    # (students AND staff) - a DB student whose google id still exists in the
-    # directory must never be archived.
-    seen_google_ids = {u.get("id") for u in directory_users if u.get("id")}
+    def __init__(self, students):
+        self.students = list(students)
+        self.by_google_id = {}
+        self.by_student_id = {}
+        self.by_email = {}
+        # Every existing ID is in memory already, so allocation never queries
+        self.student_ids = gcs.StudentIdAllocator(taken=())
+        for student in self.students:
+            self.add(student)
+
+    @staticmethod
+    def _put(mapping, key, student):
+        if not key:
+            return
+        current = mapping.get(key)
+        # Unsaved (pk None) students sort after every stored row.
+        if current is None or (
+            student.pk is not None and (current.pk is None or student.pk < current.pk)
+        ):
+            mapping[key] = student
+
+    def add(self, student):
+        self._put(self.by_google_id, student.google_user_id, student)
+        self._put(self.by_student_id, student.student_id, student)
+        self._put(self.by_email, (student.email or "").lower(), student)
+        self.student_ids.reserve(student.student_id)
+
+    def match(self, data):
+        if data["google_user_id"]:
+            student = self.by_google_id.get(data["google_user_id"])
+            if student:
+                return student
+        if data["student_id"]:
+            student = self.by_student_id.get(data["student_id"])
+            if student:
+                return student
+        if data["email"]:
+            return self.by_email.get(data["email"].lower())
+        return None
 
-    safety_valve_triggered = len(student_records) < MIN_DIRECTORY_STUDENTS
 
-    created, reactivated, skipped, archived = [], [], [], []
-    updated_count = 0
-    unchanged_count = 0
+class DirectorySyncPlan:
+    """
+    The complete, not-yet-applied outcome of one sync run.
 
-    with transaction.atomic():
-        for cohort, data in student_records:
-            email = data["email"]
-            display_name = (
-                f"{data['first_name']} {data['last_name']}".strip() or email
-            )
+    Built by :func:`plan_directory_sync` without writing anything; holds the
+    Student objects to update (already mutated in memory), the new Students
+    to create (with reserved student IDs), the pks that only need a
+    ``synced_at`` bump, the Students to archive, and the summary counts.
+    :func:`apply_directory_plan` writes exactly this plan.
+    """
 
-            student = gcs._match_existing_student(data)
-            if student:
-                update_fields = ["synced_at"]
-                changed = False
-
-                # Backfill identifiers on a match; NEVER overwrite student_id.
-                if data["google_user_id"] and not student.google_user_id:
-                    student.google_user_id = data["google_user_id"]
-                    update_fields.append("google_user_id")
-                    changed = True
-                if data["email"] and not student.email:
-                    student.email = data["email"]
-                    update_fields.append("email")
-                    changed = True
-                if student.cohort != cohort:
-                    student.cohort = cohort
-                    update_fields.append("cohort")
-                    changed = True
-
-                was_archived = not student.is_active
-                if was_archived:
-                    student.is_active = True
-                    update_fields.append("is_active")
-
-                student.synced_at = now
-                student.save(update_fields=update_fields)
-
-                if was_archived:
-                    reactivated.append(display_name)
-                elif changed:
-                    updated_count += 1
-                else:
-                    unchanged_count += 1
-                continue
+    def __init__(self, now):
+        self.now = now
+        self.to_update = {}  # pk -> Student, existing rows touched by this run
+        self.to_create = []
+        self.touch_ids = set()  # pks whose directory record is unchanged
+        self.to_archive = []
+        self.created, self.reactivated, self.skipped = [], [], []
+        self.deferred = []  # names whose rows changed between plan and apply
+        self.loaded_state = {}  # pk -> _sync_state() as read, for updates/archives
+        self.updated_count = 0
+        self.unchanged_count = 0
+        self.total_directory = 0
+        self.safety_valve_triggered = False
+
+    def summary(self, dry_run=False):
+        return {
+            "created": len(self.created),
+            "updated": self.updated_count,
+            "reactivated": len(self.reactivated),
+            "archived": len(self.to_archive),
+            "unchanged": self.unchanged_count,
+            "skipped": len(self.skipped),
+            "deferred": len(self.deferred),
+            "total_directory": self.total_directory,
+            "dry_run": dry_run,
+            "safety_valve_triggered": self.safety_valve_triggered,
+            "details": {
+                "created": self.created,
+                "reactivated": self.reactivated,
+                "archived": [s.get_full_name() for s in self.to_archive],
+                "skipped": self.skipped,
+                "deferred": self.deferred,
+            },
+        }
+
+
+def plan_directory_sync(directory_users):
+    """
+    Diff raw directory user records against the Student table, in memory.
 
-            # No match -> create with the real district ID (same fallback logic
-            # as the directory import).
-            if not data["first_name"] and not data["last_name"]:
-                skipped.append(
-                    {"name": display_name, "reason": "No name in directory profile"}
-                )
-                continue
+    Read-only: one SELECT loads every Student into an identity index;
+    matching, student ID reservation and the archive decision all happen
+    against that index. ``directory_users`` may be any iterable - a list or
+    the page-at-a-time generator from ``gcs._fetch_domain_users`` - and is
+    consumed in a single pass; only the normalized student records are kept.
+
+    Returns a :class:`DirectorySyncPlan`.
+    """
+    plan = DirectorySyncPlan(timezone.now())
+    index = _StudentIndex(Student.objects.order_by("pk"))
 
-            student_id = data["student_id"][:20]
-            if not student_id or Student.objects.filter(student_id=student_id).exists():
-                email_local = email.split("@")[0] if email else ""
-                google_fallback = (
-                    f"G{data['google_user_id']}" if data["google_user_id"] else ""
-                )
-                student_id = gcs._unique_student_id(email_local, google_fallback)
-            if not student_id:
-                skipped.append(
-                    {
-                        "name": display_name,
-                        "reason": "Could not determine a unique student ID",
-                    }
-                )
+    # "Seen" set for archiving: every google id present anywhere in the fetch
+    # (students AND staff) - a DB student whose google id still exists in the
+    # directory must never be archived.
+    seen_google_ids = set()
+
+    for u in directory_users:
+        if u.get("id"):
+            seen_google_ids.add(u["id"])
+
+        # Only student-cohort users are mirrored; staff (no two-digit email
+        # prefix) are excluded.
+        cohort = gcs._cohort_prefix(u.get("primaryEmail"))
+        if not cohort:
+            continue
+        plan.total_directory += 1
+        data = gcs._normalize_directory_user(u)
+
+        email = data["email"]
+        display_name = f"{data['first_name']} {data['last_name']}".strip() or email
+
+        fingerprint = directory_fingerprint(cohort, data)
+        student = index.match(data)
+        if student:
+            if (
+                student.pk is not None
+                and student.is_active
+                and student.directory_fingerprint == fingerprint
+                and student.pk not in plan.to_update
+            ):
+                # Same record as last run: only synced_at moves, in bulk.
+                plan.touch_ids.add(student.pk)
+                plan.unchanged_count += 1
                 continue
 
-            Student.objects.create(
-                student_id=student_id,
-                first_name=data["first_name"][:30],
-                last_name=data["last_name"][:30],
-                email=email or None,
-                google_user_id=data["google_user_id"] or None,
-                cohort=cohort,
-                synced_at=now,
-                is_active=True,
+            if student.pk is not None:
+                plan.loaded_state.setdefault(student.pk, _sync_state(student))
+            changed = False
+
+            # Backfill identifiers on a match; NEVER overwrite student_id.
+            if data["google_user_id"] and not student.google_user_id:
+                student.google_user_id = data["google_user_id"]
+                changed = True
+            if data["email"] and not student.email:
+                student.email = data["email"]
+                changed = True
+            if student.cohort != cohort:
+                student.cohort = cohort
+                changed = True
+            if changed:
+                index.add(student)  # backfilled ids become matchable
+
+            was_archived = not student.is_active
+            if was_archived:
+                student.is_active = True
+
+            student.synced_at = plan.now
+            student.directory_fingerprint = fingerprint
+            if student.pk is not None:
+                plan.to_update[student.pk] = student
+                plan.touch_ids.discard(student.pk)
+
+            if was_archived:
+                plan.reactivated.append(display_name)
+            elif changed:
+                plan.updated_count += 1
+            else:
+                plan.unchanged_count += 1
+            continue
+
+        # No match -> create with the real district ID (same fallback logic
+        # as the directory import).
+        if not data["first_name"] and not data["last_name"]:
+            plan.skipped.append({"name": display_name, "reason": "No name in directory profile"})
+            continue
+
+        student_id = data["student_id"][:20]
+        if not student_id or index.student_ids.is_taken(student_id):
+            email_local = email.split("@")[0] if email else ""
+            google_fallback = f"G{data['google_user_id']}" if data["google_user_id"] else ""
+            student_id = index.student_ids.allocate(email_local, google_fallback)
+        if not student_id:
+            plan.skipped.append(
+                {"name": display_name, "reason": "Could not determine a unique student ID"}
             )
-            created.append({"name": display_name, "student_id": student_id})
-
-        # Archive students who vanished from the directory - unless the safety
-        # valve fired (implausibly small fetch).
-        if not safety_valve_triggered:
-            archive_qs = (
-                Student.objects.filter(is_active=True)
-                .exclude(google_user_id__isnull=True)
-                .exclude(google_user_id="")
-                .exclude(google_user_id__in=seen_google_ids)
-            )
-            archive_list = list(archive_qs)
-            archived = [s.get_full_name() for s in archive_list]
-            if archive_list:
-                Student.objects.filter(
-                    id__in=[s.id for s in archive_list]
-                ).update(is_active=False)
-
-        if dry_run:
-            transaction.set_rollback(True)
-
-    return {
-        "created": len(created),
-        "updated": updated_count,
-        "reactivated": len(reactivated),
-        "archived": len(archived),
-        "unchanged": unchanged_count,
-        "skipped": len(skipped),
-        "total_directory": len(student_records),
-        "dry_run": dry_run,
-        "safety_valve_triggered": safety_valve_triggered,
-        "details": {
-            "created": created,
-            "reactivated": reactivated,
-            "archived": archived,
-            "skipped": skipped,
-        },
-    }
+            continue
+
+        student = Student(
+            student_id=student_id,
+            first_name=data["first_name"][:30],
+            last_name=data["last_name"][:30],
+            email=email or None,
+            google_user_id=data["google_user_id"] or None,
+            cohort=cohort,
+            synced_at=plan.now,
+            is_active=True,
+            directory_fingerprint=fingerprint,
+        )
+        index.add(student)
+        plan.to_create.append(student)
+        plan.created.append({"name": display_name, "student_id": student_id})
+
+    # Archive students who vanished from the directory - unless the safety
+    # valve fired (implausibly small fetch). Decided from the index, which
+    # already reflects this run's backfills and reactivations.
+    plan.safety_valve_triggered = plan.total_directory < MIN_DIRECTORY_STUDENTS
+    if not plan.safety_valve_triggered:
+        plan.to_archive = [
+            s
+            for s in index.students
+            if s.is_active and s.google_user_id and s.google_user_id not in seen_google_ids
+        ]
+        for s in plan.to_archive:
+            plan.loaded_state.setdefault(s.pk, _sync_state(s))
+    return plan
+
+
+# Columns the sync writes or matches on. A planned update/archive is only
+# applied if these still hold the values the plan read.
+SYNC_STATE_FIELDS = ("student_id", "google_user_id", "email", "cohort", "is_active")
+
+
+def _sync_state(student):
+    return tuple(getattr(student, field) for field in SYNC_STATE_FIELDS)
+
+
+def _drop_stale_writes(plan):
+    """
+    Re-validate ``plan`` against the rows it is about to write.
+
+    The plan is made outside any transaction, so a teacher may edit a
+    student (or another sync may create one) before it is applied. Students
+    planned for update/archive whose :data:`SYNC_STATE_FIELDS` no longer
+    match what the plan read are left alone instead of overwriting the edit,
+    and creates that would now duplicate a stored student (same student_id,
+    google id or email) are dropped. Costs chunked lookups over just those
+    rows; the next run picks everything dropped up again. Counts other than
+    created/archived still describe the plan; ``deferred`` lists what was
+    held back.
+    """
+    from django.db.models import Q
+    from django.db.models.functions import Lower
+
+    stale_pks = set()
+    pks = sorted(plan.loaded_state)
+    for i in range(0, len(pks), WRITE_CHUNK_SIZE):
+        for row in Student.objects.filter(pk__in=pks[i : i + WRITE_CHUNK_SIZE]).values_list(
+            "pk", *SYNC_STATE_FIELDS
+        ):
+            if row[1:] != plan.loaded_state[row[0]]:
+                stale_pks.add(row[0])
+
+    for pk in stale_pks & plan.to_update.keys():
+        plan.deferred.append(plan.to_update.pop(pk).get_full_name())
+    for s in plan.to_archive:
+        if s.pk in stale_pks:
+            plan.deferred.append(s.get_full_name())
+    plan.to_archive = [s for s in plan.to_archive if s.pk not in stale_pks]
+
+    taken_ids, taken_google_ids, taken_emails = set(), set(), set()
+    for i in range(0, len(plan.to_create), WRITE_CHUNK_SIZE):
+        chunk = plan.to_create[i : i + WRITE_CHUNK_SIZE]
+        lookup = Q(student_id__in=[s.student_id for s in chunk])
+        google_ids = [s.google_user_id for s in chunk if s.google_user_id]
+        emails = [s.email.lower() for s in chunk if s.email]
+        if google_ids:
+            lookup |= Q(google_user_id__in=google_ids)
+        if emails:
+            lookup |= Q(email_lower__in=emails)
+        for student_id, google_user_id, email in (
+            Student.objects.annotate(email_lower=Lower("email"))
+            .filter(lookup)
+            .values_list("student_id", "google_user_id", "email")
+        ):
+            taken_ids.add(student_id)
+            if google_user_id:
+                taken_google_ids.add(google_user_id)
+            if email:
+                taken_emails.add(email.lower())
+
+    kept, dropped_ids = [], set()
+    for student in plan.to_create:
+        if (
+            student.student_id in taken_ids
+            or (student.google_user_id and student.google_user_id in taken_google_ids)
+            or (student.email and student.email.lower() in taken_emails)
+        ):
+            dropped_ids.add(student.student_id)
+            plan.deferred.append(student.get_full_name())
+        else:
+            kept.append(student)
+    plan.to_create = kept
+    plan.created = [c for c in plan.created if c["student_id"] not in dropped_ids]
+
+
+def apply_directory_plan(plan):
+    """
+    Write a :class:`DirectorySyncPlan` in one transaction, as chunked
+    ``bulk_update`` / ``bulk_create`` / ``UPDATE`` statements. Active
+    students whose :func:`directory_fingerprint` is unchanged only get a bulk
+    ``synced_at`` UPDATE, so a quiet night rewrites O(changes) rows. Rows
+    changed since the plan was built are left alone (see
+    :func:`_drop_stale_writes`).
+    """
+    with transaction.atomic():
+        _drop_stale_writes(plan)
+        Student.objects.bulk_update(
+            list(plan.to_update.values()),
+            ["google_user_id", "email", "cohort", "is_active", "synced_at", "directory_fingerprint"],
+            batch_size=WRITE_CHUNK_SIZE,
+        )
+        Student.objects.bulk_create(plan.to_create, batch_size=WRITE_CHUNK_SIZE)
+        for ids, values in (
+            (sorted(plan.touch_ids), {"synced_at": plan.now}),
+            ([s.id for s in plan.to_archive], {"is_active": False}),
+        ):
+            for i in range(0, len(ids), WRITE_CHUNK_SIZE):
+                Student.objects.filter(pk__in=ids[i : i + WRITE_CHUNK_SIZE]).update(**values)
+
+
+def apply_directory_sync(directory_users, dry_run=False):
+    """
+    Plan and (unless ``dry_run``) apply a sync of raw directory user records.
+    Split out from :func:`sync_directory` so tests can drive it with a fixed
+    fixture and no Google calls.
+
+    Planning runs outside any transaction: ``directory_users`` is usually the
+    live Google stream, and holding a transaction open across the network
+    fetch would hold SQLite's lock and fail every teacher write with
+    "database is locked" until the last page arrived. Only
+    :func:`apply_directory_plan` runs in a (short) transaction, where it
+    re-checks rows edited in the meantime. A dry run only plans.
+    """
+    plan = plan_directory_sync(directory_users)
+    if not dry_run:
+        apply_directory_plan(plan)
+    return plan.summary(dry_run=dry_run)
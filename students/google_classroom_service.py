@@ -20,6 +20,8 @@ from .models import GoogleClassroomCredentials
 from .permissions import IsTeacher
 import logging
 import os
+import threading
+import time
 import certifi
 
 logger = logging.getLogger(__name__)
@@ -290,6 +292,7 @@ def google_disconnect(request):
     try:
         # Delete user's credentials
         GoogleClassroomCredentials.objects.filter(user=request.user).delete()
+        _forget_google_services(request.user)
 
         logger.info(f"Disconnected Google Classroom for user {request.user.email}")
 
@@ -367,6 +370,10 @@ def _build_directory_service_for_user(user):
     except GoogleClassroomCredentials.DoesNotExist:
         raise DirectoryAuthError("not_connected", "Google not connected.")
 
+    service = _cached_service("directory", creds_obj)
+    if service is not None:
+        return service
+
     if DIRECTORY_SCOPE not in (creds_obj.scopes or []):
         raise DirectoryAuthError(
             "scope_missing",
@@ -395,7 +402,11 @@ def _build_directory_service_for_user(user):
                 "Google credentials expired - reconnect via auth_url.",
             )
 
-    return build('admin', 'directory_v1', credentials=creds)
+    service = build(
+        'admin', 'directory_v1', credentials=creds, static_discovery=True, cache_discovery=False
+    )
+    _remember_service("directory", creds_obj, service)
+    return service
 
 
 def _directory_auth_error_response(request, error):
@@ -434,9 +445,16 @@ def _get_directory_service(request):
     return service, None
 
 
-def _fetch_domain_users(service, domain):
-    """Fetch all domain-visible users via the public directory view."""
-    users = []
+# Partial-response mask for users().list: only the fields the normalizers and
+# cohort logic read, instead of full user resources.
+DIRECTORY_USER_FIELDS = (
+    "nextPageToken,"
+    "users(id,primaryEmail,name(givenName,familyName,fullName),externalIds,orgUnitPath)"
+)
+
+
+def _iter_domain_user_pages(service, domain):
+    """Yield each page (list of user records) of the public directory view as it arrives."""
     page_token = None
 
     while True:
@@ -445,13 +463,24 @@ def _fetch_domain_users(service, domain):
             viewType='domain_public',
             maxResults=500,
             pageToken=page_token,
+            fields=DIRECTORY_USER_FIELDS,
         ).execute()
-        users.extend(response.get('users', []))
+        yield response.get('users', [])
         page_token = response.get('nextPageToken')
         if not page_token:
             break
 
-    return users
+
+def _fetch_domain_users(service, domain):
+    """
+    Stream all domain-visible users via the public directory view.
+
+    A generator: pages are requested lazily, so only one page is held in
+    memory at a time. Network/API errors surface while iterating - consume it
+    inside the caller's ``try``.
+    """
+    for page in _iter_domain_user_pages(service, domain):
+        yield from page
 
 
 def _normalize_directory_user(u):
@@ -490,6 +519,54 @@ def _cohort_prefix(email):
     return prefix if prefix.isdigit() else None
 
 
+def _listing_cache_key(user, resource):
+    """
+    Django cache key for a per-user Google listing, or None if the user has no
+    stored credentials. Keyed on the connection (row, refresh token, scopes)
+    rather than the access token, so hourly token refreshes keep the entry
+    but a disconnect/reconnect or scope change starts fresh.
+    """
+    import hashlib
+
+    creds_obj = GoogleClassroomCredentials.objects.filter(user=user).first()
+    if creds_obj is None:
+        return None
+    stamp = "|".join([
+        str(creds_obj.pk),
+        creds_obj.refresh_token or "",
+        ",".join(sorted(creds_obj.scopes or [])),
+    ])
+    digest = hashlib.md5(stamp.encode("utf-8")).hexdigest()
+    return f"google-list:{user.pk}:{resource}:{digest}"
+
+
+def _wants_refresh(request):
+    return (request.GET.get("refresh") or "").lower() in ("1", "true", "yes")
+
+
+def _get_cached_listing(request, resource):
+    """
+    Cached Google listing for (user, resource) and its cache key. The value
+    is None on a miss, for ``?refresh=1`` (the caller refetches and
+    overwrites the entry), or when the user is not connected (key is None).
+    """
+    from django.core.cache import cache
+
+    key = _listing_cache_key(request.user, resource)
+    if key is None or _wants_refresh(request):
+        return None, key
+    return cache.get(key), key
+
+
+def _set_cached_listing(key, value):
+    """Store a successful listing for GOOGLE_LISTING_CACHE_TTL seconds."""
+    from django.core.cache import cache
+
+    ttl = getattr(settings, "GOOGLE_LISTING_CACHE_TTL", 300)
+    if key is not None and ttl > 0:
+        cache.set(key, value, ttl)
+
+
 @api_view(["GET"])
 @permission_classes([IsTeacher])
 def google_directory_cohorts(request):
@@ -498,32 +575,33 @@ def google_directory_cohorts(request):
     URL: /api/google/directory-cohorts/
 
     Response: {"connected": true, "cohorts": [{"cohort": "28", "count": 58}, ...]}
-    Staff accounts (no digit prefix) are excluded.
+    Staff accounts (no digit prefix) are excluded. Cached per user for
+    GOOGLE_LISTING_CACHE_TTL seconds; ``?refresh=1`` refetches.
     """
-    service, error = _get_directory_service(request)
-    if error:
-        return error
+    cohorts, cache_key = _get_cached_listing(request, "directory-cohorts")
+    if cohorts is None:
+        service, error = _get_directory_service(request)
+        if error:
+            return error
+
+        domain = request.user.email.split('@')[-1]
+        counts = {}
+        try:
+            for u in _fetch_domain_users(service, domain):
+                prefix = _cohort_prefix(u.get("primaryEmail"))
+                if prefix:
+                    counts[prefix] = counts.get(prefix, 0) + 1
+        except Exception as e:
+            logger.error(f"Error fetching Workspace directory: {str(e)}")
+            return Response(
+                {"error": "Failed to fetch the Workspace directory.", "details": str(e)},
+                status=502,
+            )
 
-    domain = request.user.email.split('@')[-1]
-    try:
-        users = _fetch_domain_users(service, domain)
-    except Exception as e:
-        logger.error(f"Error fetching Workspace directory: {str(e)}")
-        return Response(
-            {"error": "Failed to fetch the Workspace directory.", "details": str(e)},
-            status=502,
-        )
+        cohorts = [{"cohort": c, "count": n} for c, n in sorted(counts.items())]
+        _set_cached_listing(cache_key, cohorts)
 
-    counts = {}
-    for u in users:
-        prefix = _cohort_prefix(u.get("primaryEmail"))
-        if prefix:
-            counts[prefix] = counts.get(prefix, 0) + 1
-
-    return Response({
-        "connected": True,
-        "cohorts": [{"cohort": c, "count": n} for c, n in sorted(counts.items())],
-    })
+    return Response({"connected": True, "cohorts": cohorts})
 
 
 @api_view(["GET"])
@@ -535,32 +613,38 @@ def google_directory_students(request):
 
     Response: {"cohort": "28", "students": [{student_id, first_name, last_name,
                email, google_user_id, exists}]}
-    `exists` is computed server-side against the full Student table.
+    `exists` is computed server-side against the full Student table. The
+    directory listing is cached per user and cohort (``?refresh=1``
+    refetches); `exists` is always computed fresh.
     """
     cohort = request.GET.get("cohort") or ""
     if not (cohort.isdigit() and len(cohort) == 2):
         return Response({"error": "cohort query param (two digits) is required."}, status=400)
 
-    service, error = _get_directory_service(request)
-    if error:
-        return error
+    listing, cache_key = _get_cached_listing(request, f"directory-students:{cohort}")
+    if listing is None:
+        service, error = _get_directory_service(request)
+        if error:
+            return error
 
-    domain = request.user.email.split('@')[-1]
-    try:
-        users = _fetch_domain_users(service, domain)
-    except Exception as e:
-        logger.error(f"Error fetching Workspace directory: {str(e)}")
-        return Response(
-            {"error": "Failed to fetch the Workspace directory.", "details": str(e)},
-            status=502,
-        )
+        domain = request.user.email.split('@')[-1]
+        try:
+            listing = [
+                _normalize_directory_user(u)
+                for u in _fetch_domain_users(service, domain)
+                if _cohort_prefix(u.get("primaryEmail")) == cohort
+            ]
+        except Exception as e:
+            logger.error(f"Error fetching Workspace directory: {str(e)}")
+            return Response(
+                {"error": "Failed to fetch the Workspace directory.", "details": str(e)},
+                status=502,
+            )
+
+        listing.sort(key=lambda s: (s["last_name"].lower(), s["first_name"].lower()))
+        _set_cached_listing(cache_key, listing)
 
-    students = [
-        _normalize_directory_user(u)
-        for u in users
-        if _cohort_prefix(u.get("primaryEmail")) == cohort
-    ]
-    students.sort(key=lambda s: (s["last_name"].lower(), s["first_name"].lower()))
+    students = [dict(s) for s in listing]
     for s in students:
         s["exists"] = _match_existing_student(s) is not None
 
@@ -596,7 +680,11 @@ def google_import_directory_students(request):
 
     domain = request.user.email.split('@')[-1]
     try:
-        users = _fetch_domain_users(service, domain)
+        cohort_students = [
+            _normalize_directory_user(u)
+            for u in _fetch_domain_users(service, domain)
+            if _cohort_prefix(u.get("primaryEmail")) == cohort
+        ]
     except Exception as e:
         logger.error(f"Error fetching Workspace directory for import: {str(e)}")
         return Response(
@@ -604,13 +692,15 @@ def google_import_directory_students(request):
             status=502,
         )
 
-    cohort_students = [
-        _normalize_directory_user(u)
-        for u in users
-        if _cohort_prefix(u.get("primaryEmail")) == cohort
-    ]
-
     created, existing, skipped = [], [], []
+    student_ids = StudentIdAllocator()
+    # Every ID a new student could get, loaded up front instead of one
+    # prefix query per row.
+    student_ids.preload(
+        [gs["student_id"] for gs in cohort_students]
+        + [gs["email"].split("@")[0] for gs in cohort_students if gs["email"]]
+        + [f"G{gs['google_user_id']}" for gs in cohort_students if gs["google_user_id"]]
+    )
 
     with transaction.atomic():
         for gs in cohort_students:
@@ -639,10 +729,12 @@ def google_import_directory_students(request):
 
             # Prefer the real district ID; fall back if missing or taken
             student_id = gs["student_id"][:20]
-            if not student_id or Student.objects.filter(student_id=student_id).exists():
+            if not student_id or student_ids.is_taken(student_id):
                 email_local = gs["email"].split("@")[0] if gs["email"] else ""
                 google_fallback = f"G{gs['google_user_id']}" if gs["google_user_id"] else ""
-                student_id = _unique_student_id(email_local, google_fallback)
+                student_id = student_ids.allocate(email_local, google_fallback)
+            else:
+                student_ids.reserve(student_id)
             if not student_id:
                 skipped.append({"name": display_name, "reason": "Could not determine a unique student ID"})
                 continue
@@ -783,41 +875,55 @@ def google_courses(request):
     URL: /api/google/courses/
 
     Returns {"connected": false} if the user hasn't connected Google Classroom.
+    Cached per user for GOOGLE_LISTING_CACHE_TTL seconds; ``?refresh=1``
+    refetches.
     """
-    if not is_user_connected(request.user):
+    courses, cache_key = _get_cached_listing(request, "courses")
+    if cache_key is None:
         return Response({"connected": False, "courses": []})
 
-    courses = get_user_courses(request.user)
     if courses is None:
-        return Response(
-            {"error": "Failed to fetch courses from Google Classroom. Try reconnecting."},
-            status=502,
-        )
-
-    return Response({
-        "connected": True,
-        "courses": [
+        fetched = get_user_courses(request.user)
+        if fetched is None:
+            return Response(
+                {"error": "Failed to fetch courses from Google Classroom. Try reconnecting."},
+                status=502,
+            )
+        courses = [
             {
                 "id": c.get("id"),
                 "name": c.get("name"),
                 "section": c.get("section"),
             }
-            for c in courses
-        ],
-    })
+            for c in fetched
+        ]
+        _set_cached_listing(cache_key, courses)
+
+    return Response({"connected": True, "courses": courses})
+
+
+# Upper bound on concurrent course roster fetches (see _fetch_courses_students);
+# small enough for the Pi, large enough to overlap the API round trips.
+COURSE_FETCH_WORKERS = 4
+
 
+def _fetch_course_students(service, course_id, http=None):
+    """
+    Fetch the full student roster for a course (handles pagination).
 
-def _fetch_course_students(service, course_id):
-    """Fetch the full student roster for a course (handles pagination)."""
+    ``http`` overrides the service's transport for the requests - httplib2
+    connections are not thread-safe, so concurrent callers pass their own.
+    """
     students = []
     page_token = None
 
     while True:
-        response = service.courses().students().list(
+        request = service.courses().students().list(
             courseId=course_id,
             pageSize=100,
             pageToken=page_token,
-        ).execute()
+        )
+        response = request.execute(http=http) if http is not None else request.execute()
 
         for s in response.get("students", []):
             profile = s.get("profile", {})
@@ -837,44 +943,166 @@ def _fetch_course_students(service, course_id):
     return students
 
 
+def _thread_http(credentials):
+    """
+    A private authorized transport for one worker thread. Built like the
+    client's own (``build_http``: default timeout, 308 handling) so a stuck
+    course can't hang the request.
+    """
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.http import build_http
+
+    return AuthorizedHttp(credentials, http=build_http())
+
+
+def _fetch_courses_students(service, course_ids):
+    """
+    Fetch several course rosters concurrently on a bounded thread pool, each
+    worker with its own HTTP transport. Returns ``{course_id: [students]}``;
+    the first failing course re-raises its exception.
+
+    A service without an authorized transport to copy credentials from
+    can't be given per-thread transports, and its single one must not be
+    shared across threads, so its rosters are fetched one at a time.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    credentials = getattr(getattr(service, "_http", None), "credentials", None)
+    if credentials is None or len(course_ids) < 2:
+        return {course_id: _fetch_course_students(service, course_id) for course_id in course_ids}
+
+    def fetch(course_id):
+        return _fetch_course_students(service, course_id, http=_thread_http(credentials))
+
+    workers = min(COURSE_FETCH_WORKERS, len(course_ids))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {course_id: pool.submit(fetch, course_id) for course_id in course_ids}
+        return {course_id: future.result() for course_id, future in futures.items()}
+
+
+def _merge_course_rosters(rosters):
+    """Concatenate rosters, keeping each student once (by Google id, else email)."""
+    merged, seen = [], set()
+    for students in rosters:
+        for gs in students:
+            key = gs["google_user_id"] or (gs["email"] or "").lower() or id(gs)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(gs)
+    return merged
+
+
 @api_view(["GET"])
 @permission_classes([IsTeacher])
 def google_course_students(request, course_id):
     """
     List the students in a Google Classroom course.
     URL: /api/google/courses/<course_id>/students/
+
+    Cached per user and course for GOOGLE_LISTING_CACHE_TTL seconds;
+    ``?refresh=1`` refetches.
     """
-    service = get_google_service(request.user)
-    if not service:
-        return Response({"error": "Google Classroom not connected."}, status=400)
+    students, cache_key = _get_cached_listing(request, f"course-students:{course_id}")
+    if students is None:
+        service = get_google_service(request.user)
+        if not service:
+            return Response({"error": "Google Classroom not connected."}, status=400)
 
-    try:
-        students = _fetch_course_students(service, course_id)
-    except Exception as e:
-        logger.error(f"Error fetching course roster: {str(e)}")
-        return Response(
-            {"error": "Failed to fetch roster from Google Classroom.", "details": str(e)},
-            status=502,
-        )
+        try:
+            students = _fetch_course_students(service, course_id)
+        except Exception as e:
+            logger.error(f"Error fetching course roster: {str(e)}")
+            return Response(
+                {"error": "Failed to fetch roster from Google Classroom.", "details": str(e)},
+                status=502,
+            )
+        _set_cached_listing(cache_key, students)
 
     return Response({"students": students})
 
 
-def _unique_student_id(preferred, fallback):
-    """Pick an unused student_id (max 20 chars), preferring the email local part."""
-    from .models import Student
+# Generated IDs are a base plus an optional 2..99 suffix, all within the
+# 20-char student_id column, so every candidate for a base starts with this
+# many leading characters of it.
+_STUDENT_ID_MAX = 20
+_STUDENT_ID_PREFIX = _STUDENT_ID_MAX - 2
+
+
+class StudentIdAllocator:
+    """
+    Batch allocator for unique ``student_id`` values.
+
+    Taken IDs are loaded one ``student_id__startswith`` query per candidate
+    prefix (instead of an ``exists()`` probe per candidate) and every ID
+    handed out or reserved is remembered, so a single allocator can serve a
+    whole import or sync run. Pass ``taken`` with the complete set of
+    existing IDs (e.g. from an already-loaded Student index) to allocate
+    without any queries.
+    """
 
-    candidates = [c for c in (preferred, fallback) if c]
-    for base in candidates:
-        base = base[:20]
-        if not Student.objects.filter(student_id=base).exists():
-            return base
+    def __init__(self, taken=None):
+        self.complete = taken is not None
+        self.taken = set(taken or ())
+        self._loaded_prefixes = set()
+
+    def _load(self, bases):
+        if self.complete:
+            return
+        from django.db.models import Q
+
+        from .models import Student
+
+        # A loaded prefix already covers every longer prefix that extends it
+        prefixes = {
+            prefix
+            for prefix in (base[:_STUDENT_ID_PREFIX] for base in bases)
+            if not any(prefix.startswith(loaded) for loaded in self._loaded_prefixes)
+        }
+        if not prefixes:
+            return
+        # Chunked so the OR chain stays well inside SQLite's expression depth
+        prefixes = sorted(prefixes)
+        for i in range(0, len(prefixes), 200):
+            query = Q()
+            for prefix in prefixes[i : i + 200]:
+                query |= Q(student_id__startswith=prefix)
+            self.taken.update(Student.objects.filter(query).values_list("student_id", flat=True))
+        self._loaded_prefixes.update(prefixes)
+
+    def preload(self, bases):
+        """Load the taken IDs for many candidate bases in one query up front."""
+        self._load([base[:_STUDENT_ID_MAX] for base in bases if base])
+
+    def is_taken(self, student_id):
+        self._load([student_id])
+        return student_id in self.taken
+
+    def reserve(self, student_id):
+        self.taken.add(student_id)
+
+    def allocate(self, preferred, fallback):
+        """Reserve and return an unused student_id, preferring the email local part."""
+        bases = [c[:_STUDENT_ID_MAX] for c in (preferred, fallback) if c]
+        self._load(bases)
+        for base in bases:
+            for candidate in self._candidates(base):
+                if candidate not in self.taken:
+                    self.taken.add(candidate)
+                    return candidate
+        return None
+
+    @staticmethod
+    def _candidates(base):
+        yield base
         for i in range(2, 100):
             suffix = str(i)
-            candidate = base[: 20 - len(suffix)] + suffix
-            if not Student.objects.filter(student_id=candidate).exists():
-                return candidate
-    return None
+            yield base[: _STUDENT_ID_MAX - len(suffix)] + suffix
+
+
+def _unique_student_id(preferred, fallback):
+    """Pick an unused student_id (max 20 chars), preferring the email local part."""
+    return StudentIdAllocator().allocate(preferred, fallback)
 
 
 @api_view(["POST"])
@@ -889,7 +1117,7 @@ def google_import_students(request):
     Student records for unmatched Classroom students, then enrolls everyone
     into the class (reactivating soft-deleted roster entries).
     """
-    from .models import Class, ClassRoster, Student, TeacherStudent
+    from .models import Class
 
     course_id = request.data.get("course_id")
     class_id = request.data.get("class_id")
@@ -914,78 +1142,222 @@ def google_import_students(request):
             status=502,
         )
 
-    created, enrolled, reenrolled, already_enrolled, skipped = [], [], [], [], []
+    result = _import_google_students(request.user, target_class, google_students)
+    _log_classroom_import(request.user, target_class, result)
+    return Response(result)
 
-    for gs in google_students:
-        display_name = gs["full_name"] or f"{gs['first_name']} {gs['last_name']}".strip()
 
-        # Match existing student: google_user_id first, then email
-        student = None
-        if gs["google_user_id"]:
-            student = Student.objects.filter(google_user_id=gs["google_user_id"]).first()
-        if not student and gs["email"]:
-            student = Student.objects.filter(email__iexact=gs["email"]).first()
+def _log_classroom_import(teacher, target_class, result):
+    """Log one line summarizing a Classroom import result."""
+    logger.info(
+        f"Classroom import into class {target_class.id} by {teacher.email}: "
+        f"{len(result['created'])} created, {len(result['enrolled'])} enrolled, "
+        f"{len(result['reenrolled'])} re-enrolled, "
+        f"{len(result['already_enrolled'])} already enrolled, {len(result['skipped'])} skipped"
+    )
 
-        if student:
-            # Backfill the Google id for faster matching next time
-            if gs["google_user_id"] and not student.google_user_id:
-                student.google_user_id = gs["google_user_id"]
-                student.save(update_fields=["google_user_id"])
-        else:
-            if not gs["first_name"] and not gs["last_name"]:
-                skipped.append({"name": display_name, "reason": "No name in Google profile"})
-                continue
 
-            email_local = gs["email"].split("@")[0] if gs["email"] else ""
-            google_fallback = f"G{gs['google_user_id']}" if gs["google_user_id"] else ""
-            student_id = _unique_student_id(email_local, google_fallback)
-            if not student_id:
-                skipped.append({"name": display_name, "reason": "Could not generate a unique student ID"})
-                continue
+@api_view(["POST"])
+@permission_classes([IsTeacher])
+def google_import_courses(request):
+    """
+    Import several Google Classroom courses into one class roster.
+    URL: /api/google/import-courses/
+    Body: {"course_ids": ["...", "..."], "class_id": 1}
 
-            student = Student.objects.create(
-                student_id=student_id,
-                first_name=gs["first_name"][:30],
-                last_name=gs["last_name"][:30],
-                email=gs["email"] or None,
-                google_user_id=gs["google_user_id"] or None,
-            )
-            created.append({"name": display_name, "student_id": student_id})
+    The course rosters are fetched concurrently (bounded thread pool, see
+    _fetch_courses_students), so wall time tracks the slowest course rather
+    than the sum. Students in several courses are imported once; matching
+    and enrollment then run as a single pass, exactly as import-students.
+
+    Response: the import-students summary plus ``courses``:
+    {course_id: roster size}.
+    """
+    from .models import Class
+
+    course_ids = request.data.get("course_ids")
+    class_id = request.data.get("class_id")
+    if (
+        not isinstance(course_ids, list)
+        or not course_ids
+        or not all(isinstance(c, str) and c for c in course_ids)
+        or not class_id
+    ):
+        return Response(
+            {"error": "course_ids (non-empty list) and class_id are required."}, status=400
+        )
+    course_ids = list(dict.fromkeys(course_ids))
+
+    try:
+        target_class = Class.objects.get(id=class_id, teacher=request.user)
+    except Class.DoesNotExist:
+        return Response({"error": "Class not found or you are not its teacher."}, status=404)
+
+    service = get_google_service(request.user)
+    if not service:
+        return Response({"error": "Google Classroom not connected."}, status=400)
+
+    try:
+        rosters = _fetch_courses_students(service, course_ids)
+    except Exception as e:
+        logger.error(f"Error fetching course rosters for import: {str(e)}")
+        return Response(
+            {"error": "Failed to fetch roster from Google Classroom.", "details": str(e)},
+            status=502,
+        )
+
+    google_students = _merge_course_rosters(rosters[c] for c in course_ids)
+    result = _import_google_students(request.user, target_class, google_students)
+    result["courses"] = {c: len(rosters[c]) for c in course_ids}
+    _log_classroom_import(request.user, target_class, result)
+    return Response(result)
+
+
+def _import_google_students(teacher, target_class, google_students):
+    """
+    Match/create Students for fetched Classroom roster entries and enroll
+    them in ``target_class``. Shared by the single- and multi-course imports.
+
+    Set-based: candidate matches are preloaded with one query per
+    identifier (google_user_id, lower(email); lowest pk wins, as ``.first()``
+    did), then new Students, TeacherStudent rows and ClassRoster entries are
+    bulk-created and soft-removed rows reactivated with one UPDATE each,
+    all in one transaction. Results are classified in roster order exactly
+    as the per-row version did.
+
+    Returns the import summary dict (without the per-request logging).
+    """
+    from django.db import transaction
+    from django.db.models.functions import Lower
+    from django.utils import timezone
+
+    from .models import ClassRoster, Student, TeacherStudent
+
+    created, enrolled, reenrolled, already_enrolled, skipped = [], [], [], [], []
+    student_ids = StudentIdAllocator()
+
+    google_ids = {gs["google_user_id"] for gs in google_students if gs["google_user_id"]}
+    emails = {gs["email"].lower() for gs in google_students if gs["email"]}
+    student_ids.preload(
+        [gs["email"].split("@")[0] for gs in google_students if gs["email"]]
+        + [f"G{gid}" for gid in google_ids]
+    )
+
+    with transaction.atomic():
+        by_google_id, by_email = {}, {}
+        if google_ids:
+            for student in Student.objects.filter(google_user_id__in=google_ids).order_by("-pk"):
+                by_google_id[student.google_user_id] = student
+        if emails:
+            for student in (
+                Student.objects.annotate(email_lower=Lower("email"))
+                .filter(email_lower__in=emails)
+                .order_by("-pk")
+            ):
+                by_email[student.email_lower] = student
+
+        matched = []  # (display_name, Student) in roster order, new ones unsaved
+        backfilled, new_students = {}, []
+        for gs in google_students:
+            display_name = gs["full_name"] or f"{gs['first_name']} {gs['last_name']}".strip()
+
+            # Match existing student: google_user_id first, then email
+            student = None
+            if gs["google_user_id"]:
+                student = by_google_id.get(gs["google_user_id"])
+            if not student and gs["email"]:
+                student = by_email.get(gs["email"].lower())
+
+            if student:
+                # Backfill the Google id for faster matching next time
+                if gs["google_user_id"] and not student.google_user_id:
+                    student.google_user_id = gs["google_user_id"]
+                    by_google_id.setdefault(student.google_user_id, student)
+                    if student.pk is not None:
+                        backfilled[student.pk] = student
+            else:
+                if not gs["first_name"] and not gs["last_name"]:
+                    skipped.append({"name": display_name, "reason": "No name in Google profile"})
+                    continue
+
+                email_local = gs["email"].split("@")[0] if gs["email"] else ""
+                google_fallback = f"G{gs['google_user_id']}" if gs["google_user_id"] else ""
+                student_id = student_ids.allocate(email_local, google_fallback)
+                if not student_id:
+                    skipped.append({"name": display_name, "reason": "Could not generate a unique student ID"})
+                    continue
+
+                student = Student(
+                    student_id=student_id,
+                    first_name=gs["first_name"][:30],
+                    last_name=gs["last_name"][:30],
+                    email=gs["email"] or None,
+                    google_user_id=gs["google_user_id"] or None,
+                )
+                new_students.append(student)
+                # Later duplicates of this roster entry match the new row
+                if student.google_user_id:
+                    by_google_id.setdefault(student.google_user_id, student)
+                if gs["email"]:
+                    by_email.setdefault(gs["email"].lower(), student)
+                created.append({"name": display_name, "student_id": student_id})
+
+            matched.append((display_name, student))
+
+        Student.objects.bulk_update(list(backfilled.values()), ["google_user_id"])
+        Student.objects.bulk_create(new_students)
+
+        now = timezone.now()
+        matched_ids = list(dict.fromkeys(student.pk for _, student in matched))
 
         # Importing a student IS adding them to the importing teacher's list:
         # create (or reactivate) a TeacherStudent row. Annotations stay blank -
         # never copied from any other teacher.
-        _ensure_teacher_student(request.user, student)
-
-        # Enroll (or reactivate) the student in the class
-        roster_entry, was_created = ClassRoster.objects.get_or_create(
-            class_assigned=target_class,
-            student=student,
-            defaults={"is_active": True},
+        annotations = dict(
+            TeacherStudent.objects.filter(teacher=teacher, student_id__in=matched_ids)
+            .values_list("student_id", "is_active")
+        )
+        TeacherStudent.objects.bulk_create(
+            [TeacherStudent(teacher=teacher, student_id=pk) for pk in matched_ids if pk not in annotations],
+            ignore_conflicts=True,
         )
-        if was_created:
-            enrolled.append(display_name)
-        elif not roster_entry.is_active:
-            roster_entry.is_active = True
-            roster_entry.save(update_fields=["is_active", "updated_at"])
-            reenrolled.append(display_name)
-        else:
-            already_enrolled.append(display_name)
+        inactive = [pk for pk, is_active in annotations.items() if not is_active]
+        if inactive:
+            TeacherStudent.objects.filter(teacher=teacher, student_id__in=inactive).update(
+                is_active=True, updated_at=now
+            )
 
-    logger.info(
-        f"Classroom import into class {target_class.id} by {request.user.email}: "
-        f"{len(created)} created, {len(enrolled)} enrolled, {len(reenrolled)} re-enrolled, "
-        f"{len(already_enrolled)} already enrolled, {len(skipped)} skipped"
-    )
+        # Enroll (or reactivate) the students in the class
+        roster = dict(
+            ClassRoster.objects.filter(class_assigned=target_class, student_id__in=matched_ids)
+            .values_list("student_id", "is_active")
+        )
+        to_enroll, to_reactivate = [], []
+        for display_name, student in matched:
+            state = roster.get(student.pk)
+            if state is None:
+                to_enroll.append(ClassRoster(class_assigned=target_class, student=student, is_active=True))
+                enrolled.append(display_name)
+            elif not state:
+                to_reactivate.append(student.pk)
+                reenrolled.append(display_name)
+            else:
+                already_enrolled.append(display_name)
+            roster[student.pk] = True
+        ClassRoster.objects.bulk_create(to_enroll)
+        if to_reactivate:
+            ClassRoster.objects.filter(class_assigned=target_class, student_id__in=to_reactivate).update(
+                is_active=True, updated_at=now
+            )
 
-    return Response({
+    return {
         "total": len(google_students),
         "created": created,
         "enrolled": enrolled,
         "reenrolled": reenrolled,
         "already_enrolled": already_enrolled,
         "skipped": skipped,
-    })
+    }
 
 
 # ============================================================================
@@ -1011,13 +1383,66 @@ def _ensure_teacher_student(teacher, student):
     return ts
 
 
+# Built API clients, per thread (the httplib2 transport inside a client is
+# not thread-safe): {(kind, user_id): (credentials stamp, expires_at, service)}.
+_service_cache = threading.local()
+
+
+def _credentials_stamp(creds_obj):
+    """Changes whenever the stored credentials are replaced or refreshed."""
+    return (creds_obj.pk, creds_obj.updated_at, creds_obj.access_token)
+
+
+def _thread_services():
+    services = getattr(_service_cache, "services", None)
+    if services is None:
+        services = _service_cache.services = {}
+    return services
+
+
+def _cached_service(kind, creds_obj):
+    """
+    A previously built ``kind`` ("classroom" / "directory") client for these
+    credentials, or None once it is older than GOOGLE_SERVICE_CACHE_TTL
+    seconds or the stored credentials changed (refresh, reconnect).
+    """
+    entry = _thread_services().get((kind, creds_obj.user_id))
+    if entry is None:
+        return None
+    stamp, expires_at, service = entry
+    if stamp != _credentials_stamp(creds_obj) or expires_at <= time.monotonic():
+        return None
+    return service
+
+
+def _remember_service(kind, creds_obj, service):
+    ttl = getattr(settings, "GOOGLE_SERVICE_CACHE_TTL", 300)
+    if ttl > 0:
+        _thread_services()[(kind, creds_obj.user_id)] = (
+            _credentials_stamp(creds_obj), time.monotonic() + ttl, service
+        )
+
+
+def _forget_google_services(user):
+    """Drop this thread's cached clients for ``user`` (e.g. on disconnect)."""
+    for kind in ("classroom", "directory"):
+        _thread_services().pop((kind, user.pk), None)
+
+
 def get_google_service(user):
     """
     Helper to get authenticated Google Classroom service for a user
     Returns None if user is not connected
+
+    The built client (bundled discovery document, authorized transport) is
+    reused for GOOGLE_SERVICE_CACHE_TTL seconds per thread unless the stored
+    credentials change.
     """
     try:
         creds_obj = GoogleClassroomCredentials.objects.get(user=user)
+        service = _cached_service("classroom", creds_obj)
+        if service is not None:
+            return service
 
         # Build credentials
         creds = Credentials(
@@ -1041,7 +1466,11 @@ def get_google_service(user):
 
             logger.info(f"Refreshed token for user {user.email}")
 
-        return build('classroom', 'v1', credentials=creds)
+        service = build(
+            'classroom', 'v1', credentials=creds, static_discovery=True, cache_discovery=False
+        )
+        _remember_service("classroom", creds_obj, service)
+        return service
 
     except GoogleClassroomCredentials.DoesNotExist:
         logger.warning(f"No Google credentials found for user {user.email}")
@@ -0,0 +1,323 @@
+"""
+Benchmark the Workspace directory sync against a synthetic directory.
+
+Generates a reproducible directory of N users (mixed cohorts, staff, a few
+students without an external ID) in the shape ``_fetch_domain_users`` yields,
+then runs ``directory_sync.apply_directory_sync`` on a fresh, disposable
+database in three phases:
+
+  initial  empty Student table - every directory student is created
+  steady   the same directory again - the nightly no-change case
+  churn    renames, disappearances, new students and new staff
+
+For each phase it reports wall time, query count, rows written and the
+tracemalloc peak, so regressions in the sync pipeline show up before they
+reach the nightly timer. Nothing touches the real database: the run uses
+Django's test database (for SQLite that is in-memory) and destroys it after.
+
+    python manage.py benchmark_directory_sync --users 20000 --seed 7 --json
+"""
+
+import json
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from students import directory_sync
+
+MAX_USERS = 20000
+DOMAIN = "school.edu"
+COHORTS = ("25", "26", "27", "28", "29", "30")
+
+# Share of the generated directory that is staff (no digit email prefix) and
+# of students whose profile carries no external (district) ID.
+STAFF_RATE = 0.06
+NO_EXTERNAL_ID_RATE = 0.02
+
+# Churn applied between the steady and churn phases, as shares of students.
+RENAME_RATE = 0.05
+DISAPPEAR_RATE = 0.03
+NEW_STUDENT_RATE = 0.03
+NEW_STAFF_RATE = 0.01
+
+FIRST_NAMES = (
+    "Ava",
+    "Ben",
+    "Chloe",
+    "Dev",
+    "Ella",
+    "Finn",
+    "Grace",
+    "Hugo",
+    "Isla",
+    "Jack",
+    "Kai",
+    "Lena",
+    "Maya",
+    "Noah",
+    "Omar",
+    "Priya",
+    "Quinn",
+    "Rosa",
+    "Sam",
+    "Theo",
+)
+LAST_NAMES = (
+    "Adams",
+    "Brenner",
+    "Chen",
+    "Diaz",
+    "Evans",
+    "Foster",
+    "Garcia",
+    "Hughes",
+    "Ito",
+    "Jensen",
+    "Khan",
+    "Lopez",
+    "Murphy",
+    "Nguyen",
+    "Okafor",
+    "Patel",
+    "Rossi",
+    "Smith",
+    "Tanaka",
+    "Walsh",
+)
+
+
+def _directory_user(uid, email, first, last, external_id=None):
+    """One raw directory record, limited to DIRECTORY_USER_FIELDS."""
+    user = {
+        "id": f"g-{uid}",
+        "primaryEmail": email,
+        "name": {"givenName": first, "familyName": last, "fullName": f"{first} {last}"},
+        "orgUnitPath": "/Students" if email[:2].isdigit() else "/Staff",
+    }
+    if external_id:
+        user["externalIds"] = [{"value": external_id, "type": "organization"}]
+    return user
+
+
+class _DirectoryFactory:
+    """Deterministic source of unique synthetic users for one seed."""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.next_uid = 100000
+
+    def _name(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def student(self):
+        self.next_uid += 1
+        uid = self.next_uid
+        cohort = self.rng.choice(COHORTS)
+        first, last = self._name()
+        email = f"{cohort}{first[0].lower()}{last.lower()}{uid}@{DOMAIN}"
+        external_id = None if self.rng.random() < NO_EXTERNAL_ID_RATE else f"{cohort}{uid}"
+        return _directory_user(uid, email, first, last, external_id)
+
+    def staff(self):
+        self.next_uid += 1
+        uid = self.next_uid
+        first, last = self._name()
+        return _directory_user(uid, f"{first[0].lower()}{last.lower()}{uid}@{DOMAIN}", first, last)
+
+
+def synthetic_directory(count, seed=0):
+    """
+    ``count`` raw directory users (about STAFF_RATE of them staff) plus the
+    factory that made them, so :func:`churn_directory` can mint more users
+    that never collide with these.
+    """
+    factory = _DirectoryFactory(seed)
+    users = [factory.staff() if factory.rng.random() < STAFF_RATE else factory.student() for _ in range(count)]
+    return users, factory
+
+
+def churn_directory(users, factory):
+    """
+    A copy of ``users`` after a term's worth of changes: some students are
+    renamed, some disappear (graduated / left), and new students and staff
+    appear. Returns ``(users, counts)``.
+    """
+    rng = factory.rng
+    students = [u for u in users if u["primaryEmail"][:2].isdigit()]
+    n = len(students)
+    gone = {u["id"] for u in rng.sample(students, int(n * DISAPPEAR_RATE))}
+    renamed = {u["id"] for u in rng.sample(students, int(n * RENAME_RATE)) if u["id"] not in gone}
+
+    churned = []
+    for u in users:
+        if u["id"] in gone:
+            continue
+        if u["id"] in renamed:
+            name = dict(u["name"], familyName=u["name"]["familyName"] + "-Rowe")
+            name["fullName"] = f"{name['givenName']} {name['familyName']}"
+            u = dict(u, name=name)
+        churned.append(u)
+
+    new_students = [factory.student() for _ in range(int(n * NEW_STUDENT_RATE))]
+    new_staff = [factory.staff() for _ in range(max(1, int(n * NEW_STAFF_RATE)))]
+    churned.extend(new_students + new_staff)
+    rng.shuffle(churned)
+    return churned, {
+        "renamed": len(renamed),
+        "disappeared": len(gone),
+        "new_students": len(new_students),
+        "new_staff": len(new_staff),
+    }
+
+
+class _QueryMeter:
+    """
+    ``connection.execute_wrapper`` that counts queries and rows written.
+
+    Rows written come from SQLite's ``total_changes`` counter when available:
+    ``INSERT ... RETURNING`` (bulk_create) reports no rowcount at execute time.
+    Other backends fall back to summing each write's ``cursor.rowcount``.
+    """
+
+    WRITES = ("INSERT", "UPDATE", "DELETE")
+
+    def __init__(self):
+        self.queries = 0
+        self._rowcount = 0
+        self._changes_at_start = self._total_changes()
+
+    @staticmethod
+    def _total_changes():
+        return getattr(connection.connection, "total_changes", None)
+
+    @property
+    def rows_written(self):
+        if self._changes_at_start is None:
+            return self._rowcount
+        return self._total_changes() - self._changes_at_start
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        self.queries += 1
+        if sql.lstrip()[:6].upper() in self.WRITES:
+            self._rowcount += max(context["cursor"].rowcount, 0)
+        return result
+
+
+class Command(BaseCommand):
+    help = "Benchmark the Workspace directory sync on a synthetic directory."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=5000,
+            help=f"Directory size before churn (1..{MAX_USERS}, default 5000).",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed for the synthetic directory (default 0).",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the results as JSON instead of a table.",
+        )
+        parser.add_argument(
+            "--no-tracemalloc",
+            action="store_true",
+            help="Skip peak-memory tracing (it slows the run; use for clean timings).",
+        )
+
+    def handle(self, *args, **options):
+        count = options["users"]
+        if not 1 <= count <= MAX_USERS:
+            raise CommandError(f"--users must be between 1 and {MAX_USERS}.")
+
+        self.trace_memory = not options["no_tracemalloc"]
+        users, factory = synthetic_directory(count, options["seed"])
+        churned, churn = churn_directory(users, factory)
+
+        # DEBUG's query log would be counted in the memory peak.
+        with override_settings(DEBUG=False), self._fresh_database():
+            phases = [
+                self._measure("initial", users),
+                self._measure("steady", users),
+                self._measure("churn", churned),
+            ]
+
+        report = {
+            "users": count,
+            "seed": options["seed"],
+            "churn": churn,
+            "tracemalloc": self.trace_memory,
+            "phases": phases,
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print_report(report)
+
+    @contextmanager
+    def _fresh_database(self):
+        """Swap in a new, empty test database for the run; never the real one."""
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _measure(self, name, users):
+        connection.ensure_connection()
+        meter = _QueryMeter()
+        if self.trace_memory:
+            tracemalloc.start()
+        try:
+            with connection.execute_wrapper(meter):
+                started = time.perf_counter()
+                summary = directory_sync.apply_directory_sync(users)
+                elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+        finally:
+            if self.trace_memory:
+                tracemalloc.stop()
+
+        return {
+            "phase": name,
+            "directory_users": len(users),
+            "seconds": round(elapsed, 3),
+            "queries": meter.queries,
+            "rows_written": meter.rows_written,
+            "peak_memory_kb": None if peak is None else round(peak / 1024),
+            "summary": {
+                key: summary[key] for key in ("created", "updated", "reactivated", "archived", "unchanged", "skipped")
+            },
+        }
+
+    def _print_report(self, report):
+        churn = report["churn"]
+        self.stdout.write(
+            self.style.SUCCESS(f"Directory sync benchmark: {report['users']} users, seed {report['seed']}")
+        )
+        self.stdout.write(
+            f"  churn: {churn['renamed']} renamed, {churn['disappeared']} disappeared, "
+            f"{churn['new_students']} new students, {churn['new_staff']} new staff"
+        )
+        self.stdout.write(f"  {'phase':<8} {'seconds':>8} {'queries':>8} {'rows':>8} {'peak KB':>9}  summary")
+        for phase in report["phases"]:
+            peak = "-" if phase["peak_memory_kb"] is None else phase["peak_memory_kb"]
+            summary = ", ".join(f"{k} {v}" for k, v in phase["summary"].items() if v)
+            self.stdout.write(
+                f"  {phase['phase']:<8} {phase['seconds']:>8.3f} {phase['queries']:>8} "
+                f"{phase['rows_written']:>8} {peak:>9}  {summary or 'no changes'}"
+            )
+        if report["tracemalloc"]:
+            self.stdout.write("  (timings include tracemalloc overhead; see --no-tracemalloc)")
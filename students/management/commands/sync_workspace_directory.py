@@ -83,6 +83,11 @@ class Command(BaseCommand):
         self.stdout.write(f"  archived:    {summary['archived']}")
         self.stdout.write(f"  unchanged:   {summary['unchanged']}")
         self.stdout.write(f"  skipped:     {summary['skipped']}")
+        if summary["deferred"]:
+            self.stdout.write(
+                f"  deferred:    {summary['deferred']} (edited during the sync; "
+                "picked up next run)"
+            )
 
         details = summary.get("details", {})
         if summary["skipped"]:
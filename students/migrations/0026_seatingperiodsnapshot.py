@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0025_rename_is_accessible_tableseat_is_preferential'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatingPeriodSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.BinaryField(help_text='zlib-compressed JSON from SeatingPeriod.get_snapshot_data()')),
+                ('captured_at', models.DateTimeField(auto_now=True)),
+                ('seating_period', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot', to='students.seatingperiod')),
+            ],
+        ),
+    ]
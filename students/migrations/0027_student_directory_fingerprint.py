@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 01:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0026_seatingperiodsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='directory_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
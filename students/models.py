@@ -1,10 +1,13 @@
 # students/models.py - Updated with Layout System
 import json
+import zlib
 from datetime import date
 
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.utils import timezone
 from encrypted_model_fields.fields import EncryptedCharField  # For Google OAuth token encryption
 
 
@@ -422,6 +425,9 @@ class Student(models.Model):
     cohort = models.CharField(max_length=2, blank=True, default="", db_index=True)
     # When the directory sync last touched this row.
     synced_at = models.DateTimeField(null=True, blank=True)
+    # Hash of the directory record the sync last applied (see
+    # directory_sync.directory_fingerprint); lets unchanged rows be skipped.
+    directory_fingerprint = models.CharField(max_length=32, blank=True, default="")
     enrollment_date = models.DateField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
 
@@ -565,27 +571,45 @@ class SeatingPeriod(models.Model):
         status = " (Current)" if self.end_date is None else ""
         return f"{self.class_assigned.name} - {self.name}{status}"
 
+    @classmethod
+    def end_current_periods(cls, class_id, exclude_id=None):
+        """
+        End every current tracked period of a class with a single UPDATE.
+
+        Call inside a transaction that also makes the new current period so
+        two tabs creating or promoting periods at the same time serialize and
+        can't both leave a current period behind. On SQLite that comes from
+        the IMMEDIATE transaction mode in settings (the second transaction
+        waits for the first and then ends its new period);
+        select_for_update() on the Class row is a no-op there and only locks
+        on backends that support it. Snapshots of the ended periods are not
+        built here - the snapshot endpoint captures one on first read.
+        Returns the number of periods that were ended.
+        """
+        list(Class.objects.select_for_update().filter(pk=class_id).values_list("pk", flat=True))
+
+        current = cls.objects.filter(class_assigned_id=class_id, end_date__isnull=True, is_tracked=True)
+        if exclude_id is not None:
+            current = current.exclude(pk=exclude_id)
+        return current.update(end_date=date.today(), updated_at=timezone.now())
+
     def save(self, *args, **kwargs):
-        from datetime import date
-        
-        # If this is a new TRACKED period with no end_date (making it current)
-        # We need to close any other current tracked periods for this class.
-        # Untracked one-off charts neither end other periods nor get ended.
-        if not self.pk and self.end_date is None and self.is_tracked:
-            # Find any other tracked periods for this class with no end date
-            current_periods = SeatingPeriod.objects.filter(
-                class_assigned=self.class_assigned,
-                end_date__isnull=True,
-                is_tracked=True,
-            )
-            
-            # Set their end_date to today
-            today = date.today()
-            for period in current_periods:
-                period.end_date = today
-                period.save(update_fields=["end_date"])
-        
-        super().save(*args, **kwargs)
+        is_new = self.pk is None
+
+        with transaction.atomic():
+            # A new TRACKED period with no end_date becomes current, so any
+            # other current tracked period for this class is ended. Untracked
+            # one-off charts neither end other periods nor get ended.
+            if is_new and self.end_date is None and self.is_tracked:
+                SeatingPeriod.end_current_periods(self.class_assigned_id)
+
+            super().save(*args, **kwargs)
+
+            # Any edit (rename, notes, reopening via make_current) can make an
+            # ended period's snapshot stale: drop it and let the next read
+            # of the snapshot endpoint capture a fresh one.
+            if not is_new:
+                SeatingPeriodSnapshot.objects.filter(seating_period=self).delete()
 
     def get_groups(self):
         """Get students organized by groups for this period"""
@@ -600,6 +624,52 @@ class SeatingPeriod(models.Model):
 
         return groups
 
+    def get_snapshot_data(self):
+        """
+        Frozen, self-contained view of this period: layout geometry, the seat
+        map and student display names as they stand right now. Stored in
+        :class:`SeatingPeriodSnapshot` once the period has ended.
+        """
+        layout = ClassroomLayout.objects.prefetch_related("tables__seats", "obstacles").get(pk=self.layout_id)
+        assignments = list(
+            self.seating_assignments.select_related("roster_entry__student").order_by("seat_id")
+        )
+        nicknames = dict(
+            TeacherStudent.objects.filter(
+                teacher_id=self.class_assigned.teacher_id,
+                student_id__in=[a.roster_entry.student_id for a in assignments],
+            ).values_list("student_id", "nickname")
+        )
+
+        return {
+            "period": {
+                "id": self.id,
+                "class_assigned": self.class_assigned_id,
+                "name": self.name,
+                "start_date": self.start_date,
+                "end_date": self.end_date,
+                "notes": self.notes,
+                "is_tracked": self.is_tracked,
+            },
+            "layout": layout.get_layout_data(),
+            "assignments": [
+                {
+                    "seat_id": a.seat_id,
+                    "table_number": a.table_number,
+                    "seat_number": a.seat_number,
+                    "roster_entry": a.roster_entry_id,
+                    "student_id": a.roster_entry.student_id,
+                    "first_name": a.roster_entry.student.first_name,
+                    "last_name": a.roster_entry.student.last_name,
+                    "nickname": nicknames.get(a.roster_entry.student_id) or "",
+                    "group_number": a.group_number,
+                    "group_role": a.group_role,
+                }
+                for a in assignments
+            ],
+            "captured_at": timezone.now(),
+        }
+
 
 class SeatingAssignment(models.Model):
     """Model for individual seating assignments within a seating period"""
@@ -688,6 +758,13 @@ class SeatingAssignment(models.Model):
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
+        SeatingPeriodSnapshot.invalidate(self.seating_period)
+
+    def delete(self, *args, **kwargs):
+        period = self.seating_period
+        result = super().delete(*args, **kwargs)
+        SeatingPeriodSnapshot.invalidate(period)
+        return result
 
     def __str__(self):
         group_info = f", Group {self.group_number}" if self.group_number else ""
@@ -755,6 +832,49 @@ class SeatingAssignment(models.Model):
         return table_assignments
 
 
+class SeatingPeriodSnapshot(models.Model):
+    """
+    Immutable, compressed copy of an ended seating period.
+
+    Once a period ends its chart effectively never changes, so history views
+    read this single row instead of re-joining assignments, roster entries,
+    students and the layout tree. Captured on the first read after the period
+    ends; dropped whenever the period or one of its assignments is edited, and
+    rebuilt on the next read.
+    """
+
+    seating_period = models.OneToOneField(SeatingPeriod, on_delete=models.CASCADE, related_name="snapshot")
+    data = models.BinaryField(help_text="zlib-compressed JSON from SeatingPeriod.get_snapshot_data()")
+    captured_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Snapshot of {self.seating_period}"
+
+    @classmethod
+    def capture(cls, period):
+        """Freeze ``period`` into its snapshot row (replacing any previous one)."""
+        payload = json.dumps(period.get_snapshot_data(), cls=DjangoJSONEncoder, separators=(",", ":"))
+        snapshot, _ = cls.objects.update_or_create(
+            seating_period=period, defaults={"data": zlib.compress(payload.encode("utf-8"))}
+        )
+        return snapshot
+
+    @classmethod
+    def invalidate(cls, period):
+        """Drop the snapshot of an ended period whose contents just changed."""
+        if period.end_date is not None:
+            cls.objects.filter(seating_period=period).delete()
+
+    @property
+    def json_bytes(self):
+        """Decompressed JSON document, ready to hand straight to an HTTP response."""
+        return zlib.decompress(bytes(self.data))
+
+    @property
+    def payload(self):
+        return json.loads(self.json_bytes)
+
+
 class PartnershipRating(models.Model):
     """Model to track teacher ratings of student partnerships for specific classes"""
     
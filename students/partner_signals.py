@@ -0,0 +1,376 @@
+"""
+Derived partner-pairing data for a class (GH issue #16 phase 3).
+
+Combines the teacher's :class:`~students.models.PartnershipRating` grid with
+the students' :class:`~students.models.StudentPartnerPreference` survey
+answers into:
+
+- the teacher rating grid,
+- a symmetric derived student signal per pair (:func:`derive_partner_signal`),
+- teacher/student conflicts with human-readable detail strings,
+- the ``effective_grid`` the seating tools consume (teacher rating where
+  non-zero, else the student signal, else 0).
+
+:class:`PairSignalEngine` builds all of it in one pass and caches the result
+per data version, so the n² derivation runs once per change to the roster,
+ratings, preferences or nicknames instead of once per request. The
+``partnership_ratings`` endpoint serves from it; exports and the optimizer
+can use the same engine directly. :func:`survey_analytics` summarizes the
+survey answers alone (popularity, reciprocity, isolation).
+"""
+
+import hashlib
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import ClassRoster, PartnershipRating, StudentPartnerPreference, TeacherStudent
+
+# Upper bound on how long a built engine is reused. Data changes already move
+# the version key; this only bounds staleness for edits the version can't see
+# (e.g. a student's name being corrected).
+PAIR_SIGNAL_CACHE_TIMEOUT = 60 * 10
+
+
+def derive_partner_signal(pref_ab, pref_ba):
+    """Derive a symmetric pairing signal for one unordered student pair (A, B).
+
+    ``pref_ab`` is A's self-reported preference about B (+1 / -1 / None-if-absent);
+    ``pref_ba`` is B's preference about A. Returns one of:
+
+        +2  both chose +1 (strong pair)
+        +1  exactly one chose +1, the other is absent (good pair)
+        -1  any -1 present (do-not-pair / avoid) - this DOMINATES a +1
+        None  neither expressed anything
+
+    Note the derived signal is CAPPED at -1: student input can never produce a
+    hard -2 ("Never Together"), which stays teacher-only. See GH issue #16 ph3.
+    """
+    has_negative = pref_ab == -1 or pref_ba == -1
+    if has_negative:
+        return -1
+    positives = (1 if pref_ab == 1 else 0) + (1 if pref_ba == 1 else 0)
+    if positives == 2:
+        return 2
+    if positives == 1:
+        return 1
+    return None
+
+
+def _stamp(queryset):
+    """(row count, latest updated_at) - changes whenever a row is added, edited or removed."""
+    agg = queryset.aggregate(n=Count("pk"), ts=Max("updated_at"))
+    return (agg["n"], agg["ts"].isoformat() if agg["ts"] else None)
+
+
+class PairSignalEngine:
+    """
+    Ratings, preferences and derived matrices for one class.
+
+    Use :meth:`for_class`; it returns an engine whose data was built at most
+    once per ``(roster, ratings, prefs, nicknames)`` version. Pair lookups are
+    keyed by the normalized ``(lo, hi)`` student id tuple.
+
+    Attributes:
+        students: ``[{"id", "name", "nickname"}, ...]`` active roster, in roster order
+        ratings: ``{(lo, hi): teacher rating}`` (non-zero only)
+        signals: ``{(lo, hi): derived student signal}``
+        effective: ``{(lo, hi): effective rating}`` (non-zero only)
+        conflicts: teacher/student disagreements with detail strings
+        grid, student_signals, effective_grid: the nested response shapes
+    """
+
+    def __init__(self, class_obj):
+        self.class_obj = class_obj
+
+    @classmethod
+    def for_class(cls, class_obj):
+        engine = cls(class_obj)
+        key = engine.cache_key()
+        data = cache.get(key)
+        if data is None:
+            data = engine.build()
+            cache.set(key, data, PAIR_SIGNAL_CACHE_TIMEOUT)
+        engine.__dict__.update(data)
+        return engine
+
+    # ----- versioning -------------------------------------------------------
+
+    def roster_version(self):
+        return _stamp(ClassRoster.objects.filter(class_assigned=self.class_obj))
+
+    def ratings_version(self):
+        return _stamp(PartnershipRating.objects.filter(class_assigned=self.class_obj))
+
+    def prefs_version(self):
+        return _stamp(StudentPartnerPreference.objects.filter(class_assigned=self.class_obj))
+
+    def nicknames_version(self):
+        return _stamp(
+            TeacherStudent.objects.filter(
+                teacher_id=self.class_obj.teacher_id,
+                student__enrollments__class_assigned=self.class_obj,
+            )
+        )
+
+    def cache_key(self, prefix="pair-signals", versions=None):
+        if versions is None:
+            versions = (self.roster_version, self.ratings_version, self.prefs_version, self.nicknames_version)
+        version = tuple(v() for v in versions)
+        digest = hashlib.md5(repr(version).encode("utf-8")).hexdigest()
+        return f"{prefix}:{self.class_obj.pk}:{digest}"
+
+    # ----- lookups ----------------------------------------------------------
+
+    @staticmethod
+    def pair(a, b):
+        return (a, b) if a < b else (b, a)
+
+    def rating(self, a, b):
+        return self.ratings.get(self.pair(a, b), 0)
+
+    def signal(self, a, b):
+        return self.signals.get(self.pair(a, b))
+
+    def effective_rating(self, a, b):
+        return self.effective.get(self.pair(a, b), 0)
+
+    @staticmethod
+    def triples(pair_map):
+        """``{(lo, hi): value}`` as sorted ``[lo, hi, value]`` rows (the sparse wire format)."""
+        return [[lo, hi, value] for (lo, hi), value in sorted(pair_map.items())]
+
+    # ----- build ------------------------------------------------------------
+
+    def build(self):
+        """Run the full derivation from the database (uncached)."""
+        class_obj = self.class_obj
+        roster_students = [
+            entry.student
+            for entry in ClassRoster.objects.filter(class_assigned=class_obj, is_active=True).select_related("student")
+        ]
+        student_ids = [s.id for s in roster_students]
+        student_id_set = set(student_ids)
+        student_by_id = {s.id: s for s in roster_students}
+
+        # Resolve nicknames through the class teacher's annotations (one
+        # query), falling back to first_name.
+        nickname_by_student = {
+            ts.student_id: ts.nickname
+            for ts in TeacherStudent.objects.filter(teacher_id=class_obj.teacher_id, student_id__in=student_ids)
+            if ts.nickname and ts.nickname.strip()
+        }
+
+        def _full(sid):
+            s = student_by_id[sid]
+            return f"{s.first_name} {s.last_name}"
+
+        # Display name (nickname fallback to first_name) for detail strings.
+        def _disp(sid):
+            s = student_by_id.get(sid)
+            if not s:
+                return "A student"
+            return nickname_by_student.get(sid) or s.first_name
+
+        ratings = {}
+        for r in PartnershipRating.objects.filter(
+            class_assigned=class_obj, student1__in=student_ids, student2__in=student_ids
+        ):
+            if r.rating:
+                ratings[self.pair(r.student1_id, r.student2_id)] = r.rating
+
+        # prefs[(chooser_id, target_id)] = preference (+1 / -1)
+        prefs = {}
+        for p in StudentPartnerPreference.objects.filter(
+            class_assigned=class_obj, student_id__in=student_id_set, target_id__in=student_id_set
+        ):
+            prefs[(p.student_id, p.target_id)] = p.preference
+
+        # Only pairs someone expressed a preference about can carry a signal,
+        # so derive from the preference rows instead of all n² pairs. Visited
+        # in roster order (alphabetical), as the full grid walk did, so the
+        # conflict list keeps its order.
+        position = {sid: i for i, sid in enumerate(student_ids)}
+        expressed = {self.pair(chooser, target) for chooser, target in prefs}
+        signals = {}
+        conflicts = []
+        for a, b in sorted(expressed, key=lambda p: (position[p[0]], position[p[1]])):
+            pref_ab = prefs.get((a, b))  # A chose about B
+            pref_ba = prefs.get((b, a))  # B chose about A
+            signal = derive_partner_signal(pref_ab, pref_ba)
+            if signal is None:
+                continue
+            signals[(a, b)] = signal
+
+            detail = self._conflict_detail(a, b, pref_ab, pref_ba, ratings.get((a, b), 0), _disp)
+            if detail:
+                conflicts.append(
+                    {
+                        "student1_id": a,
+                        "student2_id": b,
+                        "student1_name": _full(a),
+                        "student2_name": _full(b),
+                        "teacher_rating": ratings.get((a, b), 0),
+                        "student_signal": signal,
+                        "detail": detail,
+                    }
+                )
+
+        # Effective rating: teacher rating where non-zero, else derived student
+        # signal, else 0. Student signals are capped at -1, so a -2 here always
+        # originates from the teacher.
+        effective = dict(signals)
+        effective.update(ratings)
+
+        grid, student_signals, effective_grid = {}, {}, {}
+        for a in student_ids:
+            grid[a] = {"student_name": _full(a), "ratings": {}}
+            effective_grid[a] = {}
+            for b in student_ids:
+                if a == b:
+                    continue
+                pair = self.pair(a, b)
+                grid[a]["ratings"][b] = ratings.get(pair, 0)
+                effective_grid[a][b] = effective.get(pair, 0)
+        for (a, b), signal in signals.items():
+            student_signals.setdefault(a, {})[b] = signal
+            student_signals.setdefault(b, {})[a] = signal
+
+        return {
+            "students": [
+                {
+                    "id": sid,
+                    "name": _full(sid),
+                    "nickname": nickname_by_student.get(sid) or student_by_id[sid].first_name,
+                }
+                for sid in student_ids
+            ],
+            "ratings": ratings,
+            "signals": signals,
+            "effective": effective,
+            "conflicts": conflicts,
+            "grid": grid,
+            "student_signals": student_signals,
+            "effective_grid": effective_grid,
+        }
+
+    @staticmethod
+    def _conflict_detail(a, b, pref_ab, pref_ba, teacher_rating, _disp):
+        """Human-readable teacher/student disagreement for pair (a, b), or None."""
+        # Who chose the other +1 / -1, by direction.
+        chose_pos = [(x, y) for x, y, pref in ((a, b, pref_ab), (b, a, pref_ba)) if pref == 1]
+        chose_neg = [(x, y) for x, y, pref in ((a, b, pref_ab), (b, a, pref_ba)) if pref == -1]
+
+        if teacher_rating in (-1, -2) and chose_pos:
+            marker = "Never Together" if teacher_rating == -2 else "Avoid if Possible"
+            if len(chose_pos) == 2:
+                phrase = f"{_disp(a)} and {_disp(b)} chose each other as good partners"
+            else:
+                chooser, other = chose_pos[0]
+                phrase = f"{_disp(chooser)} chose {_disp(other)} as a good partner"
+            return f"{phrase}, but you have them marked {marker}"
+
+        if teacher_rating == 2 and chose_neg:
+            if len(chose_neg) == 2:
+                phrase = f"{_disp(a)} and {_disp(b)} both chose not to work together"
+            else:
+                chooser, other = chose_neg[0]
+                phrase = f"{_disp(chooser)} chose not to work with {_disp(other)}"
+            return f"{phrase}, but you have them marked Best Partnership"
+
+        return None
+
+
+def survey_analytics(class_obj):
+    """
+    Reciprocity and popularity metrics over a class's partner-survey answers.
+
+    Loads the active roster and preferences once into per-student adjacency
+    sets (positive / negative choices) and derives everything from set
+    operations. Cached until the roster, preferences or nicknames change;
+    teacher ratings don't affect it.
+
+    Returns::
+
+        {
+            "respondents": int, "roster_size": int,
+            "students": [{"id", "name", "nickname", "positive_in", "negative_in",
+                          "positive_out", "negative_out"}, ...],   # roster order
+            "most_chosen": [id, ...],        # positive_in desc, ties by roster order
+            "most_avoided": [id, ...],       # negative_in desc, negative_in > 0 only
+            "mutual_positive": [[lo, hi], ...],
+            "mutual_negative": [[lo, hi], ...],
+            "unreciprocated": [[chooser, target], ...],   # +1 not returned as +1
+            "isolated": [id, ...],           # nobody chose them positively
+        }
+    """
+    engine = PairSignalEngine(class_obj)
+    key = engine.cache_key(
+        prefix="survey-analytics",
+        versions=(engine.roster_version, engine.prefs_version, engine.nicknames_version),
+    )
+    data = cache.get(key)
+    if data is None:
+        data = _build_survey_analytics(class_obj)
+        cache.set(key, data, PAIR_SIGNAL_CACHE_TIMEOUT)
+    return data
+
+
+def _build_survey_analytics(class_obj):
+    roster = list(
+        ClassRoster.objects.filter(class_assigned=class_obj, is_active=True).values_list(
+            "student_id", "student__first_name", "student__last_name"
+        )
+    )
+    student_ids = [sid for sid, _first, _last in roster]
+    on_roster = set(student_ids)
+    nicknames = {
+        sid: nickname
+        for sid, nickname in TeacherStudent.objects.filter(
+            teacher_id=class_obj.teacher_id, student_id__in=student_ids
+        ).values_list("student_id", "nickname")
+        if nickname and nickname.strip()
+    }
+
+    # Adjacency: chooser -> set of targets, one set per direction
+    positive = {sid: set() for sid in student_ids}
+    negative = {sid: set() for sid in student_ids}
+    for chooser, target, preference in StudentPartnerPreference.objects.filter(
+        class_assigned=class_obj, student_id__in=on_roster, target_id__in=on_roster
+    ).values_list("student_id", "target_id", "preference"):
+        (positive if preference == 1 else negative)[chooser].add(target)
+
+    positive_in = Counter(target for targets in positive.values() for target in targets)
+    negative_in = Counter(target for targets in negative.values() for target in targets)
+
+    def _mutual(adjacency):
+        return sorted([a, b] for a, targets in adjacency.items() for b in targets if a < b and a in adjacency[b])
+
+    order = {sid: i for i, sid in enumerate(student_ids)}
+    return {
+        "respondents": sum(1 for sid in student_ids if positive[sid] or negative[sid]),
+        "roster_size": len(student_ids),
+        "students": [
+            {
+                "id": sid,
+                "name": f"{first} {last}",
+                "nickname": nicknames.get(sid) or first,
+                "positive_in": positive_in[sid],
+                "negative_in": negative_in[sid],
+                "positive_out": len(positive[sid]),
+                "negative_out": len(negative[sid]),
+            }
+            for sid, first, last in roster
+        ],
+        "most_chosen": sorted(
+            (sid for sid in student_ids if positive_in[sid]), key=lambda sid: (-positive_in[sid], order[sid])
+        ),
+        "most_avoided": sorted(
+            (sid for sid in student_ids if negative_in[sid]), key=lambda sid: (-negative_in[sid], order[sid])
+        ),
+        "mutual_positive": _mutual(positive),
+        "mutual_negative": _mutual(negative),
+        "unreciprocated": sorted([a, b] for a, targets in positive.items() for b in targets if a not in positive[b]),
+        "isolated": [sid for sid in student_ids if not positive_in[sid]],
+    }
@@ -220,6 +220,40 @@ class ClassroomLayoutSerializer(serializers.ModelSerializer):
         }
 
 
+class ExpandableFieldsMixin:
+    """
+    Per-request field selection driven by ``?fields=`` and ``?expand=``.
+
+    ``expandable_fields`` maps each expand name to the heavy serializer fields
+    it brings in. Views (see ``FieldSelectionMixin`` in views.py) pass the
+    parsed request as ``context["fields"]`` (plain fields to keep) and
+    ``context["expand"]`` (expand names to keep). With neither in the
+    context, ``default_expand`` applies - ``None`` keeps every field, so
+    existing responses are unchanged unless a caller asks for less.
+    """
+
+    expandable_fields = {}
+    default_expand = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get("fields")
+        expand = self.context.get("expand", self.default_expand)
+
+        expandable = {}
+        for name, field_names in self.expandable_fields.items():
+            for field_name in field_names:
+                expandable[field_name] = name
+
+        for field_name in list(self.fields):
+            if field_name in expandable:
+                keep = expand is None or expandable[field_name] in expand
+            else:
+                keep = fields is None or field_name in fields
+            if not keep:
+                self.fields.pop(field_name)
+
+
 # Seating assignment serializers
 
 
@@ -260,7 +294,7 @@ class SeatingAssignmentSerializer(serializers.ModelSerializer):
         return instance
 
 
-class SeatingPeriodSerializer(serializers.ModelSerializer):
+class SeatingPeriodSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     seating_assignments = SeatingAssignmentSerializer(many=True, read_only=True)
     groups = serializers.SerializerMethodField()
     layout = serializers.PrimaryKeyRelatedField(
@@ -287,10 +321,21 @@ class SeatingPeriodSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["created_at", "updated_at"]
 
+    expandable_fields = {
+        "assignments": ("seating_assignments", "groups"),
+        "layout": ("layout_details",),
+    }
+
     def get_groups(self, obj):
         """Get students organized by groups"""
+        # Built from the (prefetched) assignments rather than obj.get_groups(),
+        # which would run one more query per period.
+        groups = {}
+        for assignment in obj.seating_assignments.all():
+            if assignment.group_number is not None:
+                groups.setdefault(assignment.group_number, []).append(assignment)
+
         groups_data = {}
-        groups = obj.get_groups()
         for group_num, assignments in groups.items():
             groups_data[str(group_num)] = [
                 {
@@ -305,6 +350,16 @@ class SeatingPeriodSerializer(serializers.ModelSerializer):
         return groups_data
 
 
+class SeatingPeriodListSerializer(SeatingPeriodSerializer):
+    """
+    Slim shape for the period list: the navigators only need id/name/dates/
+    is_tracked and fetch the full period on open. ``?expand=assignments``
+    and/or ``?expand=layout`` bring the nested data back.
+    """
+
+    default_expand = frozenset()
+
+
 # Updated ClassRoster serializer (simplified - no more seating fields)
 
 
@@ -419,7 +474,7 @@ class ClassRosterSerializer(serializers.ModelSerializer):
         return None
 
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     active_classes = serializers.SerializerMethodField()
     current_enrollments = ClassRosterSerializer(source="enrollments", many=True, read_only=True)
     # nickname / gender / preferential_seating are per-teacher annotations that
@@ -437,6 +492,11 @@ class StudentSerializer(serializers.ModelSerializer):
 
     ANNOTATION_FIELDS = ("nickname", "gender", "preferential_seating")
 
+    expandable_fields = {
+        "active_classes": ("active_classes",),
+        "current_enrollments": ("current_enrollments",),
+    }
+
     class Meta:
         model = Student
         fields = [
@@ -473,7 +533,11 @@ class StudentSerializer(serializers.ModelSerializer):
         ]
 
     def get_active_classes(self, obj):
-        active_classes = obj.active_classes
+        # Use prefetched enrollments (see StudentViewSet.expansion_prefetches)
+        if "enrollments" in getattr(obj, "_prefetched_objects_cache", {}):
+            active_classes = [roster.class_assigned for roster in obj.enrollments.all() if roster.is_active]
+        else:
+            active_classes = obj.active_classes
         return [{"id": cls.id, "name": cls.name} for cls in active_classes]
 
     def _requesting_annotation(self, obj):
@@ -548,6 +612,15 @@ class StudentSerializer(serializers.ModelSerializer):
         return student
 
 
+class StudentListSerializer(StudentSerializer):
+    """
+    Lean list representation: no nested classes or enrollments unless asked
+    for with ``?expand=active_classes`` / ``?expand=current_enrollments``.
+    """
+
+    default_expand = frozenset()
+
+
 class SeatingPeriodExistsMixin:
     """Shared has_seating_periods resolution (GH #21a).
 
@@ -584,7 +657,7 @@ class ClassListSerializer(SeatingPeriodExistsMixin, serializers.ModelSerializer)
                   "updated_at"]
 
 
-class ClassSerializer(SeatingPeriodExistsMixin, serializers.ModelSerializer):
+class ClassSerializer(ExpandableFieldsMixin, SeatingPeriodExistsMixin, serializers.ModelSerializer):
     teacher = serializers.PrimaryKeyRelatedField(read_only=True)
     teacher_name = serializers.CharField(source="teacher.get_full_name", read_only=True)
     current_enrollment = serializers.ReadOnlyField()
@@ -669,6 +742,14 @@ class ClassSerializer(SeatingPeriodExistsMixin, serializers.ModelSerializer):
             "has_seating_periods",
         ]
 
+    # Heavy fields a screen can skip (?fields=... / ?expand=...); by default
+    # the detail response still includes all of them.
+    expandable_fields = {
+        "roster": ("roster",),
+        "current_seating_period": ("current_seating_period",),
+        "seating_periods": ("seating_periods",),
+    }
+
 
 # Action serializers for specific operations
 
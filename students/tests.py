@@ -1,7 +1,10 @@
 from datetime import date, timedelta
 from unittest.mock import patch
 
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 
 from .models import (
@@ -9,14 +12,17 @@ from .models import (
     ClassRoster,
     ClassroomLayout,
     ClassroomTable,
+    PartnershipRating,
     SeatingAssignment,
     SeatingPeriod,
+    SeatingPeriodSnapshot,
     Student,
     StudentPartnerPreference,
     TableSeat,
     TeacherStudent,
     User,
 )
+from .partner_signals import PairSignalEngine
 
 
 def make_user(email="teacher@school.edu", username="teacher"):
@@ -142,6 +148,43 @@ class GoogleImportStudentsTests(TestCase):
         alice = Student.objects.get(google_user_id="g-111")
         self.assertEqual(alice.student_id, "aanderson2")  # base + numeric suffix
 
+    def test_import_is_a_fixed_number_of_queries(self):
+        roster = [
+            {
+                "google_user_id": f"g-{i}",
+                "first_name": f"Kid{i}",
+                "last_name": "Test",
+                "full_name": f"Kid{i} Test",
+                "email": f"kid{i}@school.edu",
+            }
+            for i in range(35)
+        ]
+        # A mix of existing, soft-removed and new students
+        for i in range(5):
+            student = Student.objects.create(
+                student_id=f"old{i}", first_name=f"Kid{i}", last_name="Test",
+                email=f"KID{i}@school.edu",
+            )
+            ClassRoster.objects.create(class_assigned=self.klass, student=student, is_active=i % 2 == 0)
+            TeacherStudent.objects.create(teacher=self.teacher, student=student, is_active=False)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.run_import(roster)
+        data = response.json()
+        self.assertEqual(len(data["created"]), 30)
+        self.assertEqual(len(data["enrolled"]), 30)
+        self.assertEqual(len(data["reenrolled"]), 2)
+        self.assertEqual(len(data["already_enrolled"]), 3)
+        self.assertLessEqual(len(ctx.captured_queries), 15)
+
+        self.assertEqual(Student.objects.filter(google_user_id__startswith="g-").count(), 35)
+        self.assertEqual(
+            TeacherStudent.objects.filter(teacher=self.teacher, is_active=True).count(), 35
+        )
+        self.assertEqual(
+            ClassRoster.objects.filter(class_assigned=self.klass, is_active=True).count(), 35
+        )
+
     def test_rejects_class_not_owned_by_requester(self):
         other = make_user(email="other@school.edu", username="other")
         other_class = Class.objects.create(name="Math", subject="Math", teacher=other)
@@ -154,6 +197,86 @@ class GoogleImportStudentsTests(TestCase):
         self.assertEqual(response.status_code, 401)
 
 
+class GoogleImportCoursesTests(TestCase):
+    """POST /api/google/import-courses/ fetches rosters concurrently, imports once."""
+
+    def setUp(self):
+        self.teacher = make_user()
+        self.klass = Class.objects.create(name="Science", subject="Science", teacher=self.teacher)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def run_import(self, fetch, course_ids, service=None):
+        from types import SimpleNamespace
+
+        if service is None:
+            # Looks like a built client: an authorized transport with credentials
+            service = SimpleNamespace(_http=SimpleNamespace(credentials=object()))
+        with patch(
+            "students.google_classroom_service.get_google_service", return_value=service
+        ), patch(
+            "students.google_classroom_service._fetch_course_students", side_effect=fetch
+        ):
+            return self.client.post(
+                "/api/google/import-courses/",
+                {"course_ids": course_ids, "class_id": self.klass.id},
+                format="json",
+            )
+
+    def test_courses_are_fetched_concurrently_and_merged(self):
+        import threading
+
+        # Each fetch waits for the other: only passes if both run at once.
+        barrier = threading.Barrier(2, timeout=5)
+        rosters = {"c1": GOOGLE_ROSTER, "c2": [GOOGLE_ROSTER[1]]}
+        transports = []
+
+        def fetch(service, course_id, http=None):
+            transports.append(http)
+            barrier.wait()
+            return rosters[course_id]
+
+        response = self.run_import(fetch, ["c1", "c2"])
+        self.assertEqual(response.status_code, 200)
+        # Each worker has its own transport, with the client library's timeout
+        self.assertIsNot(transports[0], transports[1])
+        self.assertTrue(all(t.http.timeout for t in transports))
+        data = response.json()
+        self.assertEqual(data["courses"], {"c1": 2, "c2": 1})
+        self.assertEqual(data["total"], 2)  # Bob is in both courses, imported once
+        self.assertEqual(len(data["created"]), 2)
+        self.assertEqual(
+            ClassRoster.objects.filter(class_assigned=self.klass, is_active=True).count(), 2
+        )
+
+    def test_service_without_credentials_fetches_sequentially(self):
+        import threading
+
+        calls = []
+
+        def fetch(service, course_id, http=None):
+            calls.append((http, threading.current_thread()))
+            return GOOGLE_ROSTER
+
+        response = self.run_import(fetch, ["c1", "c2"], service=object())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(calls, [(None, threading.current_thread())] * 2)
+
+    def test_one_failing_course_fails_the_import(self):
+        def fetch(service, course_id, http=None):
+            if course_id == "bad":
+                raise Exception("course not found")
+            return GOOGLE_ROSTER
+
+        response = self.run_import(fetch, ["c1", "bad"])
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(Student.objects.count(), 0)
+
+    def test_requires_course_list(self):
+        response = self.run_import(lambda *a, **k: [], "c1")
+        self.assertEqual(response.status_code, 400)
+
+
 class GoogleSigninTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -610,6 +733,40 @@ class BulkUpdateInfoTests(TestCase):
         response = self.post_text("student_id,nickname\n1001,A")
         self.assertEqual(response.status_code, 401)
 
+    def test_query_count_does_not_grow_with_rows(self):
+        for i in range(30):
+            Student.objects.create(
+                student_id=f"2{i:03d}", first_name=f"S{i}", last_name="Test",
+                email=f"s{i}@school.edu",
+            )
+        text = "student_id,email,nickname,gender\n" + "\n".join(
+            f"2{i:03d},s{i}@school.edu,Nick{i},m" for i in range(30)
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post_text(text, apply=True)
+        self.assertEqual(len(response.json()["updated"]), 30)
+        self.assertLessEqual(len(ctx.captured_queries), 10)
+        self.assertEqual(
+            TeacherStudent.objects.filter(teacher=self.teacher, nickname__startswith="Nick").count(), 30
+        )
+
+    def test_repeated_rows_for_one_student_merge(self):
+        response = self.post_text(
+            "student_id,email,nickname,gender\n1002,,Bob,\n,RBAKER@school.edu,,m\n1002,,Bobby,",
+            apply=True,
+        )
+        self.assertEqual(len(response.json()["updated"]), 3)
+        annotation = self.annotation(self.bob)
+        self.assertEqual((annotation.nickname, annotation.gender), ("Bobby", "male"))
+
+    def test_existing_annotation_is_updated_in_place(self):
+        before = self.annotation(self.alice)
+        self.post_text("email,nickname\naanderson@school.edu,Ali", apply=True)
+        after = self.annotation(self.alice)
+        self.assertEqual(after.pk, before.pk)
+        self.assertEqual((after.nickname, after.gender), ("Ali", "female"))
+        self.assertGreater(after.updated_at, before.updated_at)
+
 
 class TeacherStudentAnnotationTests(TestCase):
     """Serializer indirection through the per-teacher annotation layer."""
@@ -813,6 +970,32 @@ class GoogleDirectoryImportTests(TestCase):
         self.assertEqual(len(data["existing"]), 2)
         self.assertEqual(Student.objects.count(), 2)
 
+    def test_import_loads_taken_ids_in_one_query(self):
+        fixture = DIRECTORY_FIXTURE + [
+            {
+                "primaryEmail": f"28kid{i}@school.edu",
+                "name": {"givenName": "Kid", "familyName": str(i)},
+                "externalIds": [{"value": f"28{i:03d}", "type": "organization"}],
+                "id": f"g-kid{i}",
+            }
+            for i in range(20)
+        ]
+        with patch(
+            "students.google_classroom_service._get_directory_service",
+            return_value=(object(), None),
+        ), patch(
+            "students.google_classroom_service._fetch_domain_users",
+            return_value=fixture,
+        ), CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/api/google/import-directory-students/", {"cohort": "28"}, format="json"
+            )
+        self.assertEqual(len(response.json()["created"]), 22)
+        prefix_queries = [
+            q for q in ctx.captured_queries if '"student_id" LIKE' in q["sql"]
+        ]
+        self.assertEqual(len(prefix_queries), 1)
+
     def test_needs_reconnect_when_scope_missing(self):
         from students.google_classroom_service import DIRECTORY_SCOPE
         from students.models import GoogleClassroomCredentials
@@ -830,6 +1013,164 @@ class GoogleDirectoryImportTests(TestCase):
         self.assertIn("auth_url", data)
 
 
+class GoogleServiceCacheTests(TestCase):
+    """Built Google API clients are reused until the TTL or the credentials change."""
+
+    def setUp(self):
+        from students import google_classroom_service as gcs
+        from students.models import GoogleClassroomCredentials
+
+        self.gcs = gcs
+        self.teacher = make_user()
+        self.creds = GoogleClassroomCredentials.objects.create(
+            user=self.teacher,
+            access_token="t", refresh_token="r",
+            token_expiry="2030-01-01T00:00:00Z",
+            scopes=[gcs.DIRECTORY_SCOPE],
+        )
+
+    def _builds(self, *calls):
+        with patch("students.google_classroom_service.build", side_effect=lambda *a, **k: object()) as build:
+            services = [call() for call in calls]
+        return build, services
+
+    def test_classroom_client_is_reused(self):
+        build, (first, second) = self._builds(
+            lambda: self.gcs.get_google_service(self.teacher),
+            lambda: self.gcs.get_google_service(self.teacher),
+        )
+        self.assertEqual(build.call_count, 1)
+        self.assertIs(first, second)
+        self.assertTrue(build.call_args.kwargs["static_discovery"])
+        self.assertFalse(build.call_args.kwargs["cache_discovery"])
+
+    def test_token_change_and_disconnect_invalidate(self):
+        build, _ = self._builds(lambda: self.gcs._build_directory_service_for_user(self.teacher))
+        self.creds.access_token = "refreshed"
+        self.creds.save()
+        build, _ = self._builds(lambda: self.gcs._build_directory_service_for_user(self.teacher))
+        self.assertEqual(build.call_count, 1)
+
+        client = APIClient()
+        client.force_authenticate(user=self.teacher)
+        client.post("/api/google/disconnect/")
+        build, (service,) = self._builds(lambda: self.gcs.get_google_service(self.teacher))
+        self.assertIsNone(service)
+        self.assertEqual(build.call_count, 0)
+
+    def test_ttl_zero_disables_the_cache(self):
+        from django.test import override_settings
+
+        with override_settings(GOOGLE_SERVICE_CACHE_TTL=0):
+            build, _ = self._builds(
+                lambda: self.gcs.get_google_service(self.teacher),
+                lambda: self.gcs.get_google_service(self.teacher),
+            )
+        self.assertEqual(build.call_count, 2)
+
+    def test_cache_is_per_thread(self):
+        import threading
+
+        self._builds(lambda: self.gcs.get_google_service(self.teacher))
+        self.assertIsNotNone(self.gcs._cached_service("classroom", self.creds))
+        results = []
+        worker = threading.Thread(
+            target=lambda: results.append(self.gcs._cached_service("classroom", self.creds))
+        )
+        worker.start()
+        worker.join()
+        self.assertEqual(results, [None])
+
+
+class GoogleListingCacheTests(TestCase):
+    """Course/roster/directory listings are cached per user until refresh or TTL."""
+
+    def setUp(self):
+        from students import google_classroom_service as gcs
+        from students.models import GoogleClassroomCredentials
+
+        cache.clear()
+        self.teacher = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+        GoogleClassroomCredentials.objects.create(
+            user=self.teacher,
+            access_token="t", refresh_token="r",
+            token_expiry="2030-01-01T00:00:00Z",
+            scopes=[gcs.DIRECTORY_SCOPE],
+        )
+
+    def _get_students(self, url):
+        with patch(
+            "students.google_classroom_service._get_directory_service",
+            return_value=(object(), None),
+        ), patch(
+            "students.google_classroom_service._fetch_domain_users",
+            return_value=DIRECTORY_FIXTURE,
+        ) as fetch:
+            response = self.client.get(url)
+        return response, fetch.call_count
+
+    def test_directory_listing_cached_but_exists_fresh(self):
+        url = "/api/google/directory-students/?cohort=28"
+        response, calls = self._get_students(url)
+        self.assertEqual(calls, 1)
+        self.assertFalse(any(s["exists"] for s in response.json()["students"]))
+
+        Student.objects.create(student_id="2887", first_name="Anika", last_name="Brenne")
+        response, calls = self._get_students(url)
+        self.assertEqual(calls, 0)
+        by_id = {s["student_id"]: s for s in response.json()["students"]}
+        self.assertTrue(by_id["2887"]["exists"])
+
+        _, calls = self._get_students(url + "&refresh=1")
+        self.assertEqual(calls, 1)
+        _, calls = self._get_students("/api/google/directory-students/?cohort=27")
+        self.assertEqual(calls, 1)
+
+    def test_courses_cached_per_user(self):
+        from students.models import GoogleClassroomCredentials
+
+        courses = [{"id": "c1", "name": "Algebra", "section": "P1", "ownerId": "x"}]
+        with patch(
+            "students.google_classroom_service.get_user_courses", return_value=courses
+        ) as fetch:
+            first = self.client.get("/api/google/courses/")
+            second = self.client.get("/api/google/courses/")
+            self.assertEqual(fetch.call_count, 1)
+            self.assertEqual(first.json(), second.json())
+            self.assertEqual(
+                second.json()["courses"], [{"id": "c1", "name": "Algebra", "section": "P1"}]
+            )
+
+            other = make_user("other@example.com", "other")
+            GoogleClassroomCredentials.objects.create(
+                user=other, access_token="t", refresh_token="r2",
+                token_expiry="2030-01-01T00:00:00Z", scopes=[],
+            )
+            self.client.force_authenticate(user=other)
+            self.client.get("/api/google/courses/")
+            self.assertEqual(fetch.call_count, 2)
+
+    def test_failures_are_not_cached_and_ttl_zero_disables(self):
+        from django.test import override_settings
+
+        with patch(
+            "students.google_classroom_service.get_google_service", return_value=object()
+        ), patch(
+            "students.google_classroom_service._fetch_course_students",
+            side_effect=[RuntimeError("boom"), [], [], []],
+        ) as fetch:
+            url = "/api/google/courses/c1/students/"
+            self.assertEqual(self.client.get(url).status_code, 502)
+            self.assertEqual(self.client.get(url).status_code, 200)
+            with override_settings(GOOGLE_LISTING_CACHE_TTL=0):
+                cache.clear()
+                self.client.get(url)
+                self.client.get(url)
+        self.assertEqual(fetch.call_count, 4)
+
+
 class GoogleStatusAndDisconnectTests(TestCase):
     """JWT-authenticated status + disconnect endpoints (issue #10)."""
 
@@ -1007,6 +1348,9 @@ class SchoolListPickerTests(TestCase):
         )
         # a is already on the teacher's list.
         TeacherStudent.objects.create(teacher=self.teacher, student=self.a)
+        # The school list is cached per (count, max synced_at); unsynced
+        # fixtures from other tests can share that version.
+        cache.clear()
 
     def test_school_list_excludes_archived_and_flags_on_my_list(self):
         response = self.client.get("/api/students/school-list/")
@@ -1077,6 +1421,29 @@ class SchoolListPickerTests(TestCase):
         self.assertIn(self.b.id, on_list)
         self.assertNotIn(self.archived.id, on_list)
 
+    def test_add_cohort_uses_a_fixed_number_of_queries(self):
+        for i in range(40):
+            Student.objects.create(
+                student_id=f"C{i:03d}", first_name=f"S{i}", last_name="Test", cohort="30"
+            )
+        cohort = list(Student.objects.filter(cohort="30").order_by("id"))
+        TeacherStudent.objects.create(teacher=self.teacher, student=cohort[0])
+        TeacherStudent.objects.create(teacher=self.teacher, student=cohort[1], is_active=False)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                "/api/students/add-to-my-list/", {"cohort": "30"}, format="json",
+            )
+        self.assertEqual(
+            response.json(), {"added": 38, "reactivated": 1, "already_on_list": 1}
+        )
+        self.assertLessEqual(len(ctx.captured_queries), 8)
+        self.assertEqual(
+            TeacherStudent.objects.filter(
+                teacher=self.teacher, student__cohort="30", is_active=True
+            ).count(),
+            40,
+        )
+
     def test_add_requires_ids_or_cohort(self):
         response = self.client.post("/api/students/add-to-my-list/", {}, format="json")
         self.assertEqual(response.status_code, 400)
@@ -1305,6 +1672,54 @@ class DirectorySyncCoreTests(TestCase):
         self.assertIsNone(self.existing.google_user_id)
         self.assertIsNone(self.existing.synced_at)
 
+    def test_dry_run_is_a_single_read(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.directory_sync.apply_directory_sync(SYNC_FIXTURE, dry_run=True)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertTrue(ctx.captured_queries[0]["sql"].startswith("SELECT"))
+
+    def test_plan_applies_without_recomputation(self):
+        plan = self.directory_sync.plan_directory_sync(SYNC_FIXTURE)
+        preview = plan.summary(dry_run=True)
+        self.assertFalse(Student.objects.filter(student_id="2999").exists())
+
+        with patch.object(self.directory_sync, "plan_directory_sync") as replan:
+            self.directory_sync.apply_directory_plan(plan)
+        replan.assert_not_called()
+
+        self.assertEqual(plan.summary()["created"], preview["created"])
+        self.assertTrue(Student.objects.filter(student_id="2999", cohort="28").exists())
+        self.gone.refresh_from_db()
+        self.assertFalse(self.gone.is_active)
+        self.reappearing.refresh_from_db()
+        self.assertTrue(self.reappearing.is_active)
+
+    def test_rows_edited_after_planning_are_not_overwritten(self):
+        plan = self.directory_sync.plan_directory_sync(SYNC_FIXTURE)
+
+        # A teacher edits a planned update/archive, and another writer
+        # creates the student the plan was about to create.
+        self.existing.email = "anika@home.example"
+        self.existing.save()
+        self.gone.email = "gone@home.example"
+        self.gone.save()
+        Student.objects.create(student_id="2999", first_name="New", last_name="Kid")
+
+        self.directory_sync.apply_directory_plan(plan)
+        summary = plan.summary()
+
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.email, "anika@home.example")
+        self.gone.refresh_from_db()
+        self.assertTrue(self.gone.is_active)
+        self.assertEqual(Student.objects.filter(student_id="2999").count(), 1)
+        self.assertEqual(summary["created"], 0)
+        self.assertEqual(summary["archived"], 0)
+        self.assertEqual(summary["deferred"], 3)
+        # Untouched rows are still applied.
+        self.reappearing.refresh_from_db()
+        self.assertTrue(self.reappearing.is_active)
+
     def test_no_name_record_is_skipped(self):
         fixture = SYNC_FIXTURE + [
             {"primaryEmail": "28noname@school.edu", "name": {}, "id": "g-noname"}
@@ -1314,6 +1729,78 @@ class DirectorySyncCoreTests(TestCase):
         self.assertEqual(summary["details"]["skipped"][0]["reason"],
                          "No name in directory profile")
 
+    def test_query_count_does_not_grow_with_directory_size(self):
+        fixture = SYNC_FIXTURE + [
+            {
+                "primaryEmail": f"29kid{i}@school.edu",
+                "name": {"givenName": "Kid", "familyName": str(i)},
+                "externalIds": [{"value": f"39{i:02d}"}],
+                "id": f"g-kid-{i}",
+            }
+            for i in range(40)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            summary = self.directory_sync.apply_directory_sync(fixture)
+        self.assertEqual(summary["created"], 41)
+        self.assertLessEqual(len(ctx.captured_queries), 12)
+        self.assertEqual(Student.objects.filter(cohort="29").count(), 40)
+
+    def test_unchanged_records_only_bump_synced_at(self):
+        self.directory_sync.apply_directory_sync(SYNC_FIXTURE)
+        self.existing.refresh_from_db()
+        first_synced = self.existing.synced_at
+        self.assertTrue(self.existing.directory_fingerprint)
+
+        with CaptureQueriesContext(connection) as ctx:
+            summary = self.directory_sync.apply_directory_sync(SYNC_FIXTURE)
+        self.assertEqual(
+            (summary["created"], summary["updated"], summary["reactivated"], summary["unchanged"]),
+            (0, 0, 0, 3),
+        )
+        writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(("UPDATE", "INSERT"))]
+        self.assertEqual(len(writes), 1)
+        self.assertIn('SET "synced_at"', writes[0])
+        self.existing.refresh_from_db()
+        self.assertGreater(self.existing.synced_at, first_synced)
+
+    def test_changed_record_is_rewritten(self):
+        self.directory_sync.apply_directory_sync(SYNC_FIXTURE)
+        moved = [dict(SYNC_FIXTURE[0], primaryEmail="27abrenn@school.edu")] + SYNC_FIXTURE[1:]
+        summary = self.directory_sync.apply_directory_sync(moved)
+        self.assertEqual(summary["updated"], 1)
+        self.assertEqual(summary["unchanged"], 2)
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.cohort, "27")
+
+    def test_records_match_students_created_earlier_in_the_run(self):
+        fixture = [
+            {
+                "primaryEmail": "28twin@school.edu",
+                "name": {"givenName": "Twin", "familyName": "One"},
+                "externalIds": [{"value": "2888"}],
+                "id": "g-twin-1",
+            },
+            # No district ID; the email local part is taken by the row above.
+            {
+                "primaryEmail": "2888@school.edu",
+                "name": {"givenName": "Twin", "familyName": "Two"},
+                "id": "g-twin-2",
+            },
+            # Same google id as the first row -> matches the new student.
+            {
+                "primaryEmail": "27twin@school.edu",
+                "name": {"givenName": "Twin", "familyName": "One"},
+                "id": "g-twin-1",
+            },
+        ]
+        summary = self.directory_sync.apply_directory_sync(fixture)
+        self.assertEqual(summary["created"], 2)
+        self.assertEqual(summary["updated"], 1)  # cohort 28 -> 27
+        self.assertEqual(
+            [c["student_id"] for c in summary["details"]["created"]], ["2888", "28882"]
+        )
+        self.assertEqual(Student.objects.get(google_user_id="g-twin-1").cohort, "27")
+
     def test_sync_directory_wires_fetch(self):
         with patch(
             "students.google_classroom_service._build_directory_service_for_user",
@@ -1338,6 +1825,141 @@ class DirectorySyncCoreTests(TestCase):
                 self.directory_sync.sync_directory(self.teacher)
 
 
+class _FakeDirectoryService:
+    """Minimal users().list(...).execute() stand-in serving canned pages."""
+
+    def __init__(self, pages, fail_on_page=None):
+        self.pages = pages
+        self.fail_on_page = fail_on_page
+        self.calls = []
+
+    def users(self):
+        return self
+
+    def list(self, **kwargs):
+        self.calls.append(kwargs)
+        return self
+
+    def execute(self):
+        page = len(self.calls) - 1
+        if page == self.fail_on_page:
+            raise Exception("page fetch failed")
+        response = {"users": self.pages[page]}
+        if page + 1 < len(self.pages):
+            response["nextPageToken"] = f"t{page + 1}"
+        return response
+
+
+class DirectoryFetchStreamingTests(TestCase):
+    """_fetch_domain_users streams masked pages; the sync consumes it in one pass."""
+
+    def test_pages_are_fetched_lazily_with_a_fields_mask(self):
+        from students import google_classroom_service as gcs
+
+        service = _FakeDirectoryService([SYNC_FIXTURE[:2], SYNC_FIXTURE[2:]])
+        users = gcs._fetch_domain_users(service, "school.edu")
+        self.assertEqual(service.calls, [])  # nothing fetched until iterated
+        self.assertEqual(next(users)["id"], "g-2887")
+        self.assertEqual(len(service.calls), 1)
+        self.assertEqual([u["id"] for u in users], ["g-2777", "g-2999", "g-staff"])
+        self.assertEqual(service.calls[1]["pageToken"], "t1")
+        self.assertEqual(service.calls[0]["fields"], gcs.DIRECTORY_USER_FIELDS)
+
+    def test_sync_consumes_the_stream(self):
+        from students import directory_sync
+
+        teacher = make_user()
+        service = _FakeDirectoryService([SYNC_FIXTURE[:1], SYNC_FIXTURE[1:]])
+        with patch(
+            "students.google_classroom_service._build_directory_service_for_user",
+            return_value=service,
+        ):
+            summary = directory_sync.sync_directory(teacher)
+        self.assertEqual(summary["created"], 3)
+        self.assertEqual(summary["total_directory"], 3)
+
+    def test_stream_is_consumed_outside_the_write_transaction(self):
+        from students import directory_sync
+
+        outer_depth = len(connection.atomic_blocks)
+        depths = []
+
+        def stream():
+            for u in SYNC_FIXTURE:
+                depths.append(len(connection.atomic_blocks))
+                yield u
+
+        summary = directory_sync.apply_directory_sync(stream())
+        self.assertEqual(summary["created"], 3)
+        self.assertEqual(set(depths), {outer_depth})
+
+    def test_failure_on_a_later_page_is_wrapped_and_writes_nothing(self):
+        from students import directory_sync
+
+        teacher = make_user()
+        gone = Student.objects.create(
+            student_id="2666", first_name="Gone", last_name="Away", google_user_id="g-gone",
+        )
+        service = _FakeDirectoryService([SYNC_FIXTURE[:1], SYNC_FIXTURE[1:]], fail_on_page=1)
+        with patch(
+            "students.google_classroom_service._build_directory_service_for_user",
+            return_value=service,
+        ):
+            with self.assertRaises(directory_sync.DirectorySyncError):
+                directory_sync.sync_directory(teacher)
+        self.assertEqual(Student.objects.count(), 1)
+        gone.refresh_from_db()
+        self.assertTrue(gone.is_active)
+
+
+class DirectorySyncBenchmarkTests(TestCase):
+    """The synthetic directory is reproducible and the benchmark reports every phase."""
+
+    def test_synthetic_directory_is_deterministic(self):
+        from students.management.commands.benchmark_directory_sync import (
+            churn_directory,
+            synthetic_directory,
+        )
+
+        users, factory = synthetic_directory(300, seed=5)
+        again, _ = synthetic_directory(300, seed=5)
+        self.assertEqual(users, again)
+        self.assertEqual(len({u["id"] for u in users}), 300)
+
+        churned, counts = churn_directory(users, factory)
+        ids = {u["id"] for u in churned}
+        self.assertEqual(
+            len(churned),
+            300 - counts["disappeared"] + counts["new_students"] + counts["new_staff"],
+        )
+        self.assertTrue(ids - {u["id"] for u in users})
+
+    def test_command_reports_each_phase(self):
+        import json
+        from contextlib import nullcontext
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from students.management.commands.benchmark_directory_sync import Command
+
+        out = StringIO()
+        # The test database is already fresh; creating another test database
+        # from inside a test would replace the one the test runs on.
+        with patch.object(Command, "_fresh_database", lambda self: nullcontext()):
+            call_command("benchmark_directory_sync", users=200, seed=1, json=True, stdout=out)
+        report = json.loads(out.getvalue())
+        initial, steady, churn = report["phases"]
+        self.assertEqual(
+            Student.objects.count(),
+            initial["summary"]["created"] + churn["summary"]["created"],
+        )
+        self.assertEqual(initial["rows_written"], initial["summary"]["created"])
+        self.assertEqual(steady["summary"]["unchanged"], initial["summary"]["created"])
+        self.assertEqual(churn["summary"]["archived"], report["churn"]["disappeared"])
+        self.assertGreater(initial["peak_memory_kb"], 0)
+
+
 class SyncDirectoryEndpointTests(TestCase):
     """POST /api/google/sync-directory/ (Sync now)."""
 
@@ -1827,6 +2449,68 @@ class PartnerSurveyTests(TestCase):
         response = client.get(self.url())
         self.assertIn(response.status_code, (401, 403))
 
+    # --- Write path (bulk full-replace) -------------------------------------
+
+    def test_post_replaces_choices_in_a_few_statements(self):
+        self.client.post(
+            self.url(),
+            {"choices": [{"target_id": self.alice.id, "preference": 1}]},
+            format="json",
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                self.url(),
+                {"choices": [
+                    {"target_id": self.bob.id, "preference": 1},
+                    {"target_id": self.carol.id, "preference": -1},
+                ]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        statements = [
+            q["sql"] for q in ctx.captured_queries
+            if not q["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT"))
+        ]
+        # gate (+ roster version), delete, upsert (classmates served from cache)
+        self.assertLessEqual(len(statements), 3)
+        got = set(
+            StudentPartnerPreference.objects.filter(student=self.me)
+            .values_list("target_id", "preference")
+        )
+        self.assertEqual(got, {(self.bob.id, 1), (self.carol.id, -1)})
+        self.assertEqual(
+            {(c["target_id"], c["preference"]) for c in response.data["choices"]}, got
+        )
+
+    def test_post_upsert_flips_existing_preference(self):
+        for preference in (1, -1):
+            self.client.post(
+                self.url(),
+                {"choices": [{"target_id": self.alice.id, "preference": preference}]},
+                format="json",
+            )
+        pref = StudentPartnerPreference.objects.get(student=self.me, target=self.alice)
+        self.assertEqual(pref.preference, -1)
+
+    def test_get_reads_roster_from_cache(self):
+        self.client.get(self.url())
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url())
+        self.assertEqual(len(response.data["classmates"]), 3)
+        # roster gate (+ version) and the requester's own choices
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+    def test_classmates_cache_follows_roster_changes(self):
+        self.client.get(self.url())
+        dave = Student.objects.create(student_id="S-5", first_name="Dave", last_name="Dunn")
+        ClassRoster.objects.create(class_assigned=self.klass, student=dave)
+        response = self.client.get(self.url())
+        self.assertIn(dave.id, [c["id"] for c in response.data["classmates"]])
+
+        ClassRoster.objects.filter(student=dave).update(is_active=False, updated_at=self.timezone.now())
+        response = self.client.get(self.url())
+        self.assertNotIn(dave.id, [c["id"] for c in response.data["classmates"]])
+
 
 class ClassSurveyFieldSerializerTests(TestCase):
     """The three survey fields round-trip through the Class serializer for the
@@ -2247,3 +2931,681 @@ class ClassArchiveTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data["id"], self.archived_class.id)
         self.assertFalse(response.data["is_active"])
+
+
+def make_layout(teacher, tables=2, seats=2):
+    layout = ClassroomLayout.objects.create(name="Room", room_width=10, room_height=8, created_by=teacher)
+    for table_number in range(1, tables + 1):
+        table = ClassroomTable.objects.create(
+            layout=layout, table_number=table_number, x_position=table_number * 3, y_position=0, max_seats=seats
+        )
+        for seat_number in range(1, seats + 1):
+            TableSeat.objects.create(table=table, seat_number=seat_number, relative_x=0.5, relative_y=0.5)
+    return layout
+
+
+class SeatingPeriodSnapshotTests(TestCase):
+    """Ended periods are frozen into a compressed snapshot row."""
+
+    def setUp(self):
+        self.teacher = make_user()
+        self.klass = Class.objects.create(name="Science", subject="Science", teacher=self.teacher)
+        self.layout = make_layout(self.teacher)
+        self.roster = []
+        for i in range(2):
+            student = Student.objects.create(student_id=f"s{i}", first_name=f"Kid{i}", last_name="Test")
+            self.roster.append(ClassRoster.objects.create(class_assigned=self.klass, student=student))
+        TeacherStudent.objects.create(teacher=self.teacher, student=self.roster[0].student, nickname="Kiddo")
+
+        self.period = SeatingPeriod.objects.create(
+            class_assigned=self.klass, layout=self.layout, name="Chart 1", start_date=date.today() - timedelta(days=7)
+        )
+        for i, entry in enumerate(self.roster):
+            SeatingAssignment.objects.create(seating_period=self.period, roster_entry=entry, seat_id=f"1-{i + 1}")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def test_snapshot_captured_on_first_read_after_period_ends(self):
+        SeatingPeriod.objects.create(
+            class_assigned=self.klass, layout=self.layout, name="Chart 2", start_date=date.today()
+        )
+        # Ending a period doesn't build its snapshot; the first read does.
+        self.assertFalse(SeatingPeriodSnapshot.objects.filter(seating_period=self.period).exists())
+        self.client.get(f"/api/seating-periods/{self.period.id}/snapshot/")
+
+        payload = SeatingPeriodSnapshot.objects.get(seating_period=self.period).payload
+        self.assertEqual(payload["period"]["name"], "Chart 1")
+        self.assertEqual(len(payload["layout"]["tables"]), 2)
+        by_seat = {a["seat_id"]: a for a in payload["assignments"]}
+        self.assertEqual(by_seat["1-1"]["first_name"], "Kid0")
+        self.assertEqual(by_seat["1-1"]["nickname"], "Kiddo")
+        self.assertEqual(by_seat["1-2"]["student_id"], self.roster[1].student_id)
+
+    def test_endpoint_serves_snapshot(self):
+        SeatingPeriod.objects.create(
+            class_assigned=self.klass, layout=self.layout, name="Chart 2", start_date=date.today()
+        )
+        response = self.client.get(f"/api/seating-periods/{self.period.id}/snapshot/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(len(response.json()["assignments"]), 2)
+
+    def test_endpoint_rejects_current_period(self):
+        response = self.client.get(f"/api/seating-periods/{self.period.id}/snapshot/")
+        self.assertEqual(response.status_code, 400)
+
+    def test_endpoint_is_scoped_to_teacher(self):
+        SeatingPeriod.objects.create(
+            class_assigned=self.klass, layout=self.layout, name="Chart 2", start_date=date.today()
+        )
+        other = make_user(email="other@school.edu", username="other")
+        self.client.force_authenticate(user=other)
+        response = self.client.get(f"/api/seating-periods/{self.period.id}/snapshot/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_editing_ended_period_rebuilds_snapshot_lazily(self):
+        SeatingPeriod.objects.create(
+            class_assigned=self.klass, layout=self.layout, name="Chart 2", start_date=date.today()
+        )
+        self.period.refresh_from_db()
+        assignment = SeatingAssignment.objects.get(seating_period=self.period, seat_id="1-2")
+        assignment.seat_id = "2-1"
+        assignment.save()
+        self.assertFalse(SeatingPeriodSnapshot.objects.filter(seating_period=self.period).exists())
+
+        response = self.client.get(f"/api/seating-periods/{self.period.id}/snapshot/")
+        seats = {a["seat_id"] for a in response.json()["assignments"]}
+        self.assertEqual(seats, {"1-1", "2-1"})
+        self.assertTrue(SeatingPeriodSnapshot.objects.filter(seating_period=self.period).exists())
+
+    def test_editing_ended_period_only_drops_snapshot(self):
+        SeatingPeriod.objects.create(
+            class_assigned=self.klass, layout=self.layout, name="Chart 2", start_date=date.today()
+        )
+        self.period.refresh_from_db()
+        self.client.get(f"/api/seating-periods/{self.period.id}/snapshot/")
+
+        self.period.notes = "Quiz week"
+        with CaptureQueriesContext(connection) as ctx:
+            self.period.save(update_fields=["notes", "updated_at"])
+        statements = [q["sql"] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+        self.assertEqual(len(statements), 2)  # UPDATE + snapshot DELETE, no rebuild
+        self.assertFalse(SeatingPeriodSnapshot.objects.filter(seating_period=self.period).exists())
+
+    def test_reopening_period_drops_snapshot(self):
+        SeatingPeriod.objects.create(
+            class_assigned=self.klass, layout=self.layout, name="Chart 2", start_date=date.today()
+        )
+        response = self.client.post(f"/api/seating-periods/{self.period.id}/make_current/")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(SeatingPeriodSnapshot.objects.filter(seating_period=self.period).exists())
+
+
+class SeatingPeriodListExpandTests(TestCase):
+    """The period list is slim unless ?expand= asks for nested data."""
+
+    def setUp(self):
+        self.teacher = make_user()
+        self.klass = Class.objects.create(name="Science", subject="Science", teacher=self.teacher)
+        self.layout = make_layout(self.teacher)
+        student = Student.objects.create(student_id="s1", first_name="Kid", last_name="Test")
+        entry = ClassRoster.objects.create(class_assigned=self.klass, student=student)
+        self.period = SeatingPeriod.objects.create(
+            class_assigned=self.klass, layout=self.layout, name="Chart 1", start_date=date.today()
+        )
+        SeatingAssignment.objects.create(seating_period=self.period, roster_entry=entry, seat_id="1-1", group_number=1)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def _list(self, query=""):
+        response = self.client.get(f"/api/seating-periods/?class_assigned={self.klass.id}{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"][0]
+
+    def test_list_is_slim_by_default(self):
+        row = self._list()
+        for key in ("id", "name", "start_date", "end_date", "is_tracked", "layout", "updated_at"):
+            self.assertIn(key, row)
+        for key in ("seating_assignments", "groups", "layout_details"):
+            self.assertNotIn(key, row)
+
+    def test_expand_assignments(self):
+        row = self._list("&expand=assignments")
+        self.assertEqual(len(row["seating_assignments"]), 1)
+        self.assertEqual(len(row["groups"]["1"]), 1)
+        self.assertNotIn("layout_details", row)
+
+    def test_expand_assignments_and_layout(self):
+        row = self._list("&expand=assignments,layout")
+        self.assertIn("seating_assignments", row)
+        self.assertEqual(len(row["layout_details"]["tables"]), 2)
+
+    def test_detail_still_returns_everything(self):
+        response = self.client.get(f"/api/seating-periods/{self.period.id}/")
+        for key in ("seating_assignments", "groups", "layout_details"):
+            self.assertIn(key, response.data)
+
+
+class ClassDetailFieldSelectionTests(TestCase):
+    """?fields= / ?expand= narrow the class detail response (default unchanged)."""
+
+    def setUp(self):
+        self.teacher = make_user()
+        self.klass = Class.objects.create(name="Science", subject="Science", teacher=self.teacher)
+        student = Student.objects.create(student_id="s1", first_name="Kid", last_name="Test")
+        ClassRoster.objects.create(class_assigned=self.klass, student=student)
+        SeatingPeriod.objects.create(
+            class_assigned=self.klass, layout=make_layout(self.teacher), name="Chart 1", start_date=date.today()
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def _get(self, query=""):
+        response = self.client.get(f"/api/classes/{self.klass.id}/{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_default_includes_every_field(self):
+        data = self._get()
+        self.assertEqual(len(data["roster"]), 1)
+        self.assertEqual(data["current_seating_period"]["name"], "Chart 1")
+        self.assertEqual(len(data["seating_periods"]), 1)
+
+    def test_fields_limits_response(self):
+        data = self._get("?fields=id,name,survey_enabled")
+        self.assertEqual(set(data), {"id", "name", "survey_enabled"})
+
+    def test_expand_keeps_plain_fields_and_named_expansion(self):
+        data = self._get("?expand=roster")
+        self.assertIn("name", data)
+        self.assertEqual(len(data["roster"]), 1)
+        self.assertNotIn("seating_periods", data)
+        self.assertNotIn("current_seating_period", data)
+
+    def test_fields_naming_expandable_field(self):
+        data = self._get("?fields=id,seating_periods")
+        self.assertEqual(set(data), {"id", "seating_periods"})
+
+    def test_fields_ignored_on_write(self):
+        response = self.client.patch(
+            f"/api/classes/{self.klass.id}/?fields=id", {"name": "Biology"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.klass.refresh_from_db()
+        self.assertEqual(self.klass.name, "Biology")
+
+
+class SeatingPeriodDiffTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user()
+        self.klass = Class.objects.create(name="Science", subject="Science", teacher=self.teacher)
+        self.layout = make_layout(self.teacher, tables=2, seats=3)
+        self.entries = {}
+        for name in ("Ann", "Ben", "Cal", "Dee", "Eve"):
+            student = Student.objects.create(student_id=name, first_name=name, last_name="Test")
+            self.entries[name] = ClassRoster.objects.create(class_assigned=self.klass, student=student)
+
+        self.old = SeatingPeriod.objects.create(
+            class_assigned=self.klass, layout=self.layout, name="Chart 1",
+            start_date=date.today() - timedelta(days=14), end_date=date.today() - timedelta(days=7),
+        )
+        self.new = SeatingPeriod.objects.create(
+            class_assigned=self.klass, layout=self.layout, name="Chart 2", start_date=date.today()
+        )
+        self._seat(self.old, {"Ann": "1-1", "Ben": "1-2", "Cal": "2-1", "Dee": "2-2"})
+        # Ann and Ben stay together (new table), Cal keeps seat, Dee leaves, Eve joins
+        self._seat(self.new, {"Ann": "2-2", "Ben": "2-3", "Cal": "2-1", "Eve": "1-1"})
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def _seat(self, period, seats):
+        for name, seat_id in seats.items():
+            SeatingAssignment.objects.create(seating_period=period, roster_entry=self.entries[name], seat_id=seat_id)
+
+    def test_diff_reports_only_the_delta(self):
+        response = self.client.get(f"/api/seating-periods/{self.new.id}/diff/?against={self.old.id}")
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+
+        self.assertEqual(
+            [(m["name"], m["from_seat"], m["to_seat"]) for m in data["moved"]],
+            [("Ann Test", "1-1", "2-2"), ("Ben Test", "1-2", "2-3")],
+        )
+        self.assertEqual([a["name"] for a in data["added"]], ["Eve Test"])
+        self.assertEqual([r["name"] for r in data["removed"]], ["Dee Test"])
+        self.assertEqual(data["unchanged_count"], 1)
+        self.assertEqual(
+            [(p["names"], p["from_table"], p["to_table"]) for p in data["unchanged_table_mates"]],
+            [(["Ann Test", "Ben Test"], 1, 2)],
+        )
+
+    def test_against_is_required(self):
+        response = self.client.get(f"/api/seating-periods/{self.new.id}/diff/")
+        self.assertEqual(response.status_code, 400)
+
+    def test_periods_must_share_a_class(self):
+        other_class = Class.objects.create(name="Math", subject="Math", teacher=self.teacher)
+        other = SeatingPeriod.objects.create(
+            class_assigned=other_class, layout=self.layout, name="Chart 1", start_date=date.today()
+        )
+        response = self.client.get(f"/api/seating-periods/{self.new.id}/diff/?against={other.id}")
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_teachers_period_is_not_found(self):
+        self.client.force_authenticate(user=make_user(email="other@school.edu", username="other"))
+        response = self.client.get(f"/api/seating-periods/{self.new.id}/diff/?against={self.old.id}")
+        self.assertEqual(response.status_code, 404)
+
+
+class EndCurrentPeriodsTests(TestCase):
+    """Ending current periods is one UPDATE, whether via save() or make_current."""
+
+    def setUp(self):
+        self.teacher = make_user()
+        self.klass = Class.objects.create(name="Science", subject="Science", teacher=self.teacher)
+        self.layout = make_layout(self.teacher)
+        self.a = self._period("Chart 1", days_ago=20)
+        self.b = self._period("Chart 2", days_ago=10)
+        # Simulate the two-tab race outcome: two current tracked periods
+        SeatingPeriod.objects.filter(pk__in=[self.a.pk, self.b.pk]).update(end_date=None)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def _period(self, name, days_ago=0, **kwargs):
+        return SeatingPeriod.objects.create(
+            class_assigned=self.klass, layout=self.layout, name=name,
+            start_date=date.today() - timedelta(days=days_ago), **kwargs
+        )
+
+    def _period_updates(self, queries):
+        return [
+            q["sql"] for q in queries
+            if q["sql"].startswith('UPDATE "students_seatingperiod"')
+        ]
+
+    def test_new_current_period_ends_all_others_in_one_update(self):
+        with CaptureQueriesContext(connection) as ctx:
+            c = self._period("Chart 3")
+        self.assertEqual(len(self._period_updates(ctx.captured_queries)), 1)
+        current = SeatingPeriod.objects.filter(class_assigned=self.klass, end_date__isnull=True, is_tracked=True)
+        self.assertEqual(list(current), [c])
+        # No snapshot work while the periods are switched over
+        self.assertLessEqual(len(ctx.captured_queries), 5)
+        self.assertFalse(SeatingPeriodSnapshot.objects.filter(seating_period=self.a).exists())
+
+    def test_make_current_ends_all_others(self):
+        old = self._period("Chart 0", days_ago=30, end_date=date.today() - timedelta(days=25), is_tracked=False)
+        response = self.client.post(f"/api/seating-periods/{old.id}/make_current/")
+        self.assertEqual(response.status_code, 200)
+        current = SeatingPeriod.objects.filter(class_assigned=self.klass, end_date__isnull=True, is_tracked=True)
+        self.assertEqual(list(current), [old])
+
+    def test_untracked_periods_are_left_alone(self):
+        one_off = self._period("Sub Day", is_tracked=False)
+        self._period("Chart 3")
+        one_off.refresh_from_db()
+        self.assertIsNone(one_off.end_date)
+
+
+class BulkUpdateRatingsTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user()
+        self.klass = Class.objects.create(name="Science", subject="Science", teacher=self.teacher)
+        self.students = []
+        for i in range(4):
+            student = Student.objects.create(student_id=f"s{i}", first_name=f"Kid{i}", last_name="Test")
+            ClassRoster.objects.create(class_assigned=self.klass, student=student)
+            self.students.append(student)
+        self.outsider = Student.objects.create(student_id="x", first_name="Out", last_name="Sider")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+
+    def _post(self, ratings):
+        return self.client.post(
+            f"/api/classes/{self.klass.id}/bulk-update-ratings/", {"ratings": ratings}, format="json"
+        )
+
+    def _rating(self, a, b):
+        lo, hi = sorted([a.id, b.id])
+        row = PartnershipRating.objects.filter(class_assigned=self.klass, student1_id=lo, student2_id=hi).first()
+        return row.rating if row else 0
+
+    def test_upserts_normalized_pairs_and_reports_errors(self):
+        s0, s1, s2, s3 = self.students
+        response = self._post([
+            {"student1_id": s1.id, "student2_id": s0.id, "rating": 2},
+            {"student1_id": s2.id, "student2_id": s3.id, "rating": -1},
+            {"student1_id": s0.id, "student2_id": self.outsider.id, "rating": 1},
+            {"student1_id": s0.id, "student2_id": 999999, "rating": 1},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_updated"], 2)
+        self.assertEqual(
+            [e["error"] for e in response.data["errors"]],
+            ["One or both students not in class", "Invalid student ID"],
+        )
+        self.assertEqual(response.data["updated"][0]["student1_id"], min(s0.id, s1.id))
+        self.assertEqual(self._rating(s0, s1), 2)
+        self.assertEqual(self._rating(s2, s3), -1)
+
+    def test_update_and_reset_existing_ratings(self):
+        s0, s1, s2, _ = self.students
+        self._post([
+            {"student1_id": s0.id, "student2_id": s1.id, "rating": 2},
+            {"student1_id": s0.id, "student2_id": s2.id, "rating": -2},
+        ])
+        response = self._post([
+            {"student1_id": s1.id, "student2_id": s0.id, "rating": -1},
+            {"student1_id": s2.id, "student2_id": s0.id, "rating": 0},
+        ])
+        self.assertEqual(response.data["total_errors"], 0)
+        self.assertEqual(self._rating(s0, s1), -1)
+        self.assertEqual(self._rating(s0, s2), 0)
+        self.assertEqual(PartnershipRating.objects.filter(class_assigned=self.klass).count(), 1)
+
+    def test_query_count_does_not_grow_with_payload(self):
+        pairs = [(a, b) for i, a in enumerate(self.students) for b in self.students[i + 1:]]
+        with CaptureQueriesContext(connection) as ctx:
+            self._post([{"student1_id": a.id, "student2_id": b.id, "rating": 1} for a, b in pairs])
+        self.assertLess(len(ctx.captured_queries), 15)
+
+
+class PairSignalEngineCacheTests(TestCase):
+    """The pair-signal derivation runs once per data version, not per request."""
+
+    def setUp(self):
+        self.teacher = make_user()
+        self.klass = Class.objects.create(name="Homeroom", subject="General", teacher=self.teacher)
+        self.a = Student.objects.create(student_id="S-1", first_name="Maya", last_name="Adams")
+        self.b = Student.objects.create(student_id="S-2", first_name="Jake", last_name="Brown")
+        for s in (self.a, self.b):
+            ClassRoster.objects.create(class_assigned=self.klass, student=s)
+
+    def _engine(self):
+        with patch.object(PairSignalEngine, "build", autospec=True, side_effect=PairSignalEngine.build) as build:
+            engine = PairSignalEngine.for_class(self.klass)
+        return engine, build.call_count
+
+    def test_second_lookup_is_served_from_cache(self):
+        self.assertEqual(self._engine()[1], 1)
+        self.assertEqual(self._engine()[1], 0)
+
+    def test_rating_and_preference_changes_rebuild(self):
+        self._engine()
+        PartnershipRating.set_rating(self.klass, self.a, self.b, -1)
+        engine, builds = self._engine()
+        self.assertEqual(builds, 1)
+        self.assertEqual(engine.rating(self.b.id, self.a.id), -1)
+
+        StudentPartnerPreference.objects.create(
+            class_assigned=self.klass, student=self.a, target=self.b, preference=1
+        )
+        engine, builds = self._engine()
+        self.assertEqual(builds, 1)
+        self.assertEqual(engine.signal(self.a.id, self.b.id), 1)
+        self.assertEqual(engine.effective_rating(self.a.id, self.b.id), -1)  # teacher rating wins
+        self.assertEqual(len(engine.conflicts), 1)
+
+    def test_conflicts_keep_roster_order(self):
+        # Alphabetically first on the roster, but the highest id
+        z = Student.objects.create(student_id="S-0", first_name="Zed", last_name="Aaron")
+        ClassRoster.objects.create(class_assigned=self.klass, student=z)
+        for x, y in ((self.a, self.b), (self.a, z), (self.b, z)):
+            PartnershipRating.set_rating(self.klass, x, y, -1)
+            StudentPartnerPreference.objects.create(
+                class_assigned=self.klass, student=x, target=y, preference=1
+            )
+        engine, _ = self._engine()
+        # The grid walk: each roster student paired with later-id classmates
+        self.assertEqual(
+            [(c["student1_id"], c["student2_id"]) for c in engine.conflicts],
+            [(self.a.id, z.id), (self.a.id, self.b.id), (self.b.id, z.id)],
+        )
+
+    def test_roster_change_rebuilds(self):
+        self._engine()
+        c = Student.objects.create(student_id="S-3", first_name="Nia", last_name="Carter")
+        ClassRoster.objects.create(class_assigned=self.klass, student=c)
+        engine, builds = self._engine()
+        self.assertEqual(builds, 1)
+        self.assertEqual(len(engine.students), 3)
+
+    def test_sparse_response_lists_only_non_zero_pairs(self):
+        c = Student.objects.create(student_id="S-3", first_name="Nia", last_name="Carter")
+        ClassRoster.objects.create(class_assigned=self.klass, student=c)
+        PartnershipRating.set_rating(self.klass, self.b, self.a, 2)
+        StudentPartnerPreference.objects.create(
+            class_assigned=self.klass, student=c, target=self.a, preference=-1
+        )
+        client = APIClient()
+        client.force_authenticate(user=self.teacher)
+        response = client.get(f"/api/classes/{self.klass.id}/partnership-ratings/?sparse=1")
+        self.assertEqual(response.status_code, 200)
+
+        lo, hi = sorted([self.a.id, self.b.id])
+        ac = sorted([self.a.id, c.id])
+        self.assertTrue(response.data["sparse"])
+        self.assertEqual(response.data["grid"], [[lo, hi, 2]])
+        self.assertEqual(response.data["student_signals"], [[*ac, -1]])
+        self.assertEqual(response.data["effective_grid"], sorted([[lo, hi, 2], [*ac, -1]]))
+        self.assertEqual(len(response.data["students"]), 3)
+
+
+class SurveyAnalyticsTests(TestCase):
+    """GET /api/classes/{id}/survey-analytics/ summarizes survey answers once per version."""
+
+    def setUp(self):
+        self.teacher = make_user()
+        self.klass = Class.objects.create(name="Homeroom", subject="General", teacher=self.teacher)
+        self.a, self.b, self.c, self.d = [
+            Student.objects.create(student_id=f"S-{i}", first_name=name, last_name="Test")
+            for i, name in enumerate(["Maya", "Jake", "Nia", "Omar"], start=1)
+        ]
+        for s in (self.a, self.b, self.c, self.d):
+            ClassRoster.objects.create(class_assigned=self.klass, student=s)
+        for chooser, target, pref in [
+            (self.a, self.b, 1), (self.b, self.a, 1),  # mutual positive
+            (self.c, self.a, 1),                       # unreciprocated
+            (self.c, self.d, -1), (self.d, self.c, -1),  # mutual negative
+            (self.a, self.d, -1),
+        ]:
+            StudentPartnerPreference.objects.create(
+                class_assigned=self.klass, student=chooser, target=target, preference=pref
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+        self.url = f"/api/classes/{self.klass.id}/survey-analytics/"
+
+    def test_metrics(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        by_id = {row["id"]: row for row in data["students"]}
+        self.assertEqual(data["respondents"], 4)
+        self.assertEqual(by_id[self.a.id]["positive_in"], 2)
+        self.assertEqual(by_id[self.a.id]["positive_out"], 1)
+        self.assertEqual(by_id[self.d.id]["negative_in"], 2)
+        self.assertEqual(data["most_chosen"], [self.a.id, self.b.id])
+        self.assertEqual(data["most_avoided"][0], self.d.id)
+        self.assertEqual(data["mutual_positive"], [sorted([self.a.id, self.b.id])])
+        self.assertEqual(data["mutual_negative"], [sorted([self.c.id, self.d.id])])
+        self.assertEqual(data["unreciprocated"], [[self.c.id, self.a.id]])
+        self.assertEqual(data["isolated"], [self.c.id, self.d.id])
+
+    def test_cached_until_preferences_change(self):
+        self.client.get(self.url)
+        with patch("students.partner_signals._build_survey_analytics") as build:
+            self.client.get(self.url)
+        build.assert_not_called()
+
+        StudentPartnerPreference.objects.filter(student=self.c, target=self.a).delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["unreciprocated"], [])
+        self.assertIn(self.a.id, response.data["most_chosen"])
+
+    def test_other_teacher_gets_404(self):
+        other = make_user("other@example.com", "other")
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class StudentListScopingTests(TestCase):
+    """/api/students/ is lean by default and only loads annotations it serializes."""
+
+    def setUp(self):
+        self.teacher = make_user()
+        self.other = make_user(email="other@school.edu", username="other")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+        self.klass = Class.objects.create(name="Math", subject="Math", teacher=self.teacher)
+        self.students = []
+        for i in range(6):
+            student = Student.objects.create(student_id=f"L{i}", first_name=f"S{i}", last_name="Test")
+            TeacherStudent.objects.create(teacher=self.teacher, student=student)
+            # Another teacher's annotation with no class link to this student
+            TeacherStudent.objects.create(teacher=self.other, student=student, nickname="Theirs")
+            ClassRoster.objects.create(class_assigned=self.klass, student=student)
+            self.students.append(student)
+
+    def _results(self, response):
+        data = response.json()
+        return data.get("results", data) if isinstance(data, dict) else data
+
+    def test_list_omits_nested_fields_by_default(self):
+        response = self.client.get("/api/students/")
+        self.assertEqual(response.status_code, 200)
+        row = self._results(response)[0]
+        self.assertNotIn("active_classes", row)
+        self.assertNotIn("current_enrollments", row)
+        self.assertIn("nickname", row)
+
+    def test_expand_active_classes_uses_prefetched_enrollments(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/students/?expand=active_classes")
+        rows = self._results(response)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]["active_classes"], [{"id": self.klass.id, "name": "Math"}])
+        self.assertLessEqual(len(ctx.captured_queries), 8)
+
+    def test_roster_annotation_prefetch_skips_unrelated_teachers(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/students/?expand=current_enrollments")
+        rows = self._results(response)
+        self.assertEqual(len(rows[0]["current_enrollments"]), 1)
+        # The class-teacher annotation lookup is scoped by an EXISTS on the roster
+        self.assertTrue(any(
+            q["sql"].startswith('SELECT "students_teacherstudent"') and "EXISTS" in q["sql"]
+            for q in ctx.captured_queries
+        ))
+
+        # Detail responses keep every field
+        detail = self.client.get(f"/api/students/{self.students[0].id}/").json()
+        self.assertIn("active_classes", detail)
+        self.assertIn("current_enrollments", detail)
+
+    def test_list_has_no_duplicates_without_distinct(self):
+        other_class = Class.objects.create(name="Art", subject="Art", teacher=self.teacher)
+        ClassRoster.objects.create(class_assigned=other_class, student=self.students[0])
+        rows = self._results(self.client.get("/api/students/"))
+        self.assertEqual(len(rows), 6)
+        detail = self.client.get(f"/api/students/{self.students[0].id}/")
+        self.assertEqual(detail.status_code, 200)
+
+
+class SchoolListCacheTests(TestCase):
+    """The global school-list feed is cached per sync version and ETagged."""
+
+    URL = "/api/students/school-list/"
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+        self.students = [
+            Student.objects.create(
+                student_id=f"28{i:02d}", first_name=f"S{i}", last_name="Test",
+                cohort="28" if i % 2 else "27",
+            )
+            for i in range(6)
+        ]
+        self._sync()
+
+    def _sync(self):
+        """Stand-in for a directory sync run: bumps every synced_at."""
+        from django.utils import timezone
+
+        Student.objects.update(synced_at=timezone.now())
+
+    def test_global_part_is_built_once_per_version(self):
+        self.client.get(self.URL)
+        with patch(
+            "students.views.StudentViewSet._build_school_list",
+            side_effect=AssertionError("should be cached"),
+        ):
+            response = self.client.get(self.URL + "?cohort=27")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["students"]), 3)
+        self.assertEqual(len(response.json()["cohorts"]), 2)
+
+        Student.objects.filter(pk=self.students[0].pk).update(first_name="Renamed")
+        self._sync()
+        names = {s["first_name"] for s in self.client.get(self.URL).json()["students"]}
+        self.assertIn("Renamed", names)
+
+    def test_on_my_list_is_per_request(self):
+        self.client.get(self.URL)
+        TeacherStudent.objects.create(teacher=self.teacher, student=self.students[1])
+        flagged = [s["id"] for s in self.client.get(self.URL).json()["students"] if s["on_my_list"]]
+        self.assertEqual(flagged, [self.students[1].id])
+
+    def test_matching_etag_returns_304(self):
+        first = self.client.get(self.URL)
+        etag = first["ETag"]
+        self.assertTrue(etag)
+
+        again = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertFalse(again.content)
+
+        # A different cohort filter or list membership is a different body
+        self.assertEqual(self.client.get(self.URL + "?cohort=28", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        TeacherStudent.objects.create(teacher=self.teacher, student=self.students[0])
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class StudentIdAllocatorTests(TestCase):
+    """Unique student_id allocation reads taken IDs by prefix, not per probe."""
+
+    def setUp(self):
+        from students.google_classroom_service import StudentIdAllocator, _unique_student_id
+
+        self.Allocator = StudentIdAllocator
+        self.unique_student_id = _unique_student_id
+        for student_id in ("jdoe", "jdoe2", "jdoe3"):
+            Student.objects.create(student_id=student_id, first_name="J", last_name="Doe")
+
+    def test_single_query_picks_first_free_suffix(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.unique_student_id("jdoe", "Gjdoe"), "jdoe4")
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_long_bases_truncate_before_suffixing(self):
+        base = "averyveryverylongname"  # 21 chars
+        Student.objects.create(student_id=base[:20], first_name="A", last_name="B")
+        self.assertEqual(self.unique_student_id(base, ""), base[:19] + "2")
+
+    def test_batch_reserves_across_calls_without_requerying(self):
+        ids = self.Allocator()
+        with CaptureQueriesContext(connection) as ctx:
+            allocated = [ids.allocate("jdoe", "") for _ in range(3)]
+            self.assertTrue(ids.is_taken("jdoe5"))
+        self.assertEqual(allocated, ["jdoe4", "jdoe5", "jdoe6"])
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_falls_back_when_preferred_base_is_exhausted(self):
+        ids = self.Allocator(taken={"x"} | {f"x{i}" for i in range(2, 100)})
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(ids.allocate("x", "Gx"), "Gx")
+        self.assertEqual(len(ctx.captured_queries), 0)
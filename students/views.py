@@ -23,12 +23,14 @@ from .models import (
     PartnershipRating,
     SeatingAssignment,
     SeatingPeriod,
+    SeatingPeriodSnapshot,
     Student,
     StudentPartnerPreference,
     TableSeat,
     TeacherStudent,
     User,
 )
+from .partner_signals import PairSignalEngine, derive_partner_signal, survey_analytics  # noqa: F401 (re-exported)
 from .permissions import (
     HasExternalAPIKey,
     IsSpecialPointsUser,
@@ -48,7 +50,9 @@ from .serializers import (
     ClassSerializer,
     LayoutObstacleSerializer,
     SeatingAssignmentSerializer,
+    SeatingPeriodListSerializer,
     SeatingPeriodSerializer,
+    StudentListSerializer,
     StudentSerializer,
     TableSeatSerializer,
     UserCreateSerializer,
@@ -59,6 +63,65 @@ from .serializers import (
 )
 
 
+class FieldSelectionMixin:
+    """
+    Shared ``?fields=`` / ``?expand=`` handling for read requests.
+
+    - ``?fields=id,name`` keeps only those plain serializer fields.
+    - ``?expand=roster,...`` keeps those entries of the serializer's
+      ``expandable_fields`` (naming an expandable field in ``?fields=``
+      expands it too).
+    - With neither, the serializer's ``default_expand`` decides.
+
+    ``expansion_prefetches`` maps expand names to the prefetch_related lookups
+    they need, so the queryset only loads what will actually be serialized.
+    Only GET requests are narrowed; writes always validate the full serializer.
+    """
+
+    expansion_prefetches = {}
+
+    def _query_param_set(self, name):
+        if self.request is None or self.request.method != "GET":
+            return None
+        raw = self.request.query_params.get(name)
+        if raw is None:
+            return None
+        return {part.strip() for part in raw.split(",") if part.strip()}
+
+    def requested_expansions(self):
+        """Expand names that will be serialized for this request."""
+        serializer_class = self.get_serializer_class()
+        expandable = getattr(serializer_class, "expandable_fields", {})
+        fields = self._query_param_set("fields")
+        expand = self._query_param_set("expand")
+
+        if fields is None and expand is None:
+            default = getattr(serializer_class, "default_expand", None)
+            return set(expandable) if default is None else set(default)
+
+        names = set(expand or ())
+        if fields:
+            names |= {name for name, field_names in expandable.items() if fields.intersection(field_names)}
+        return names & set(expandable)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields = self._query_param_set("fields")
+        if fields is not None:
+            context["fields"] = fields
+        if fields is not None or self._query_param_set("expand") is not None:
+            context["expand"] = self.requested_expansions()
+        return context
+
+    def prefetch_expansions(self, queryset):
+        """Add the prefetches for every expansion this request serializes."""
+        for name in sorted(self.requested_expansions()):
+            lookups = self.expansion_prefetches.get(name, ())
+            if lookups:
+                queryset = queryset.prefetch_related(*lookups)
+        return queryset
+
+
 class UserViewSet(viewsets.ModelViewSet):
     """
     ViewSet for user management.
@@ -244,7 +307,7 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(FieldSelectionMixin, viewsets.ModelViewSet):
     """
     ViewSet for the requesting teacher's "my students" list.
 
@@ -263,19 +326,33 @@ class StudentViewSet(viewsets.ModelViewSet):
     date_of_birth is the one teacher-writable global field. nickname, gender,
     and preferential_seating are per-teacher annotations stored on
     TeacherStudent.
+
+    The list is lean by default; ``?expand=active_classes`` and/or
+    ``?expand=current_enrollments`` bring the nested data back. Detail and
+    write responses keep every field.
     """
     # Base queryset lets the DRF router infer the basename; get_queryset()
     # below is what actually runs (adds per-request prefetching + scoping).
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     permission_classes = [IsTeacher]
+    expansion_prefetches = {
+        "active_classes": ("enrollments__class_assigned",),
+        "current_enrollments": ("enrollments__class_assigned__teacher",),
+    }
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return StudentListSerializer
+        return StudentSerializer
 
     def get_queryset(self):
         """
         Scope to the teacher's students and prefetch the annotations the
         serializer needs (the requesting teacher's own row for nickname/gender/
-        preferential_seating, plus the class-teacher rows for the nested
-        ClassRoster serializer) to avoid N+1 queries.
+        preferential_seating, plus - only when current_enrollments is
+        serialized - the class-teacher rows for the nested ClassRoster
+        serializer) to avoid N+1 queries.
 
         - list: only active TeacherStudent rows (the teacher's "my students").
           Archived global students (Student.is_active=False) still on the list
@@ -284,8 +361,10 @@ class StudentViewSet(viewsets.ModelViewSet):
           (active or not) OR one enrolled in one of their classes, so the
           editor keeps working for a student removed from the list but still on
           a roster.
+
+        Membership is tested with EXISTS subqueries, so no join or DISTINCT.
         """
-        from django.db.models import Prefetch, Q
+        from django.db.models import Exists, OuterRef, Prefetch
 
         user = self.request.user
 
@@ -294,27 +373,35 @@ class StudentViewSet(viewsets.ModelViewSet):
             queryset=TeacherStudent.objects.filter(teacher=user),
             to_attr="my_annotations",
         )
-        roster_annotations = Prefetch(
-            "enrollments__student__teacher_annotations",
-            queryset=TeacherStudent.objects.all(),
-            to_attr="teacher_annotations_list",
-        )
-        base = Student.objects.prefetch_related(
-            my_annotations,
-            "enrollments__class_assigned__teacher",
-            roster_annotations,
-        )
+        base = self.prefetch_expansions(Student.objects.prefetch_related(my_annotations))
+        if "current_enrollments" in self.requested_expansions():
+            # Only the annotations of teachers whose classes the student is
+            # enrolled in - the rows ClassRosterSerializer actually resolves.
+            base = base.prefetch_related(
+                Prefetch(
+                    "enrollments__student__teacher_annotations",
+                    queryset=TeacherStudent.objects.filter(
+                        Exists(
+                            ClassRoster.objects.filter(
+                                student=OuterRef("student"),
+                                class_assigned__teacher=OuterRef("teacher"),
+                            )
+                        )
+                    ),
+                    to_attr="teacher_annotations_list",
+                )
+            )
 
+        on_my_list = TeacherStudent.objects.filter(teacher=user, student=OuterRef("pk"))
         if self.action == "list":
-            return base.filter(
-                teacher_annotations__teacher=user,
-                teacher_annotations__is_active=True,
-            ).distinct()
+            return base.filter(Exists(on_my_list.filter(is_active=True)))
 
         return base.filter(
-            Q(teacher_annotations__teacher=user)
-            | Q(enrollments__class_assigned__teacher=user)
-        ).distinct()
+            Exists(on_my_list)
+            | Exists(
+                ClassRoster.objects.filter(class_assigned__teacher=user, student=OuterRef("pk"))
+            )
+        )
 
     def create(self, request, *args, **kwargs):
         """Manual student creation is disabled by design (#14)."""
@@ -347,7 +434,58 @@ class StudentViewSet(viewsets.ModelViewSet):
                           cohort, on_my_list}],
             "cohorts": [{"cohort": "28", "count": 40}, ...]
         }
+
+        The global part (students + cohort counts) only changes when the
+        directory sync or an import writes Students, so it is cached keyed on
+        max(synced_at) plus the Student row count; only the teacher's
+        on_my_list set is read per request. The response carries an ETag and
+        a matching If-None-Match gets a bodiless 304.
         """
+        import hashlib
+
+        from django.core.cache import cache
+        from django.db.models import Count, Max
+
+        stamp = Student.objects.aggregate(n=Count("id"), v=Max("synced_at"))
+        last_synced = stamp["v"]
+        version = f"{stamp['n']}:{last_synced.isoformat() if last_synced else ''}"
+
+        cache_key = f"school-list:{version}"
+        school = cache.get(cache_key)
+        if school is None:
+            school = self._build_school_list()
+            cache.set(cache_key, school, self.SCHOOL_LIST_CACHE_TIMEOUT)
+
+        cohort = request.query_params.get("cohort")
+
+        # Which students are already on the requesting teacher's active list.
+        on_my_list_ids = set(
+            TeacherStudent.objects.filter(
+                teacher=request.user, is_active=True
+            ).values_list("student_id", flat=True)
+        )
+
+        etag_source = f"{version}|{cohort or ''}|{sorted(on_my_list_ids)}"
+        etag = '"%s"' % hashlib.md5(etag_source.encode("utf-8")).hexdigest()
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag in {tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")}:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        students = [
+            {**s, "on_my_list": s["id"] in on_my_list_ids}
+            for s in school["students"]
+            if not cohort or s["cohort"] == cohort
+        ]
+
+        return Response({
+            "students": students,
+            "cohorts": school["cohorts"],
+            "last_synced": last_synced,
+        }, headers=headers)
+
+    @staticmethod
+    def _build_school_list():
+        """Global (teacher-independent) part of the school-list feed."""
         from django.db.models import Count
 
         students_qs = Student.objects.filter(is_active=True)
@@ -360,19 +498,6 @@ class StudentViewSet(viewsets.ModelViewSet):
             .annotate(count=Count("id"))
             .order_by("cohort")
         ]
-
-        cohort = request.query_params.get("cohort")
-        if cohort:
-            students_qs = students_qs.filter(cohort=cohort)
-
-        # Which of these are already on the requesting teacher's active list.
-        on_my_list_ids = set(
-            TeacherStudent.objects.filter(
-                teacher=request.user, is_active=True
-            ).values_list("student_id", flat=True)
-        )
-
-        students_qs = students_qs.order_by("last_name", "first_name")
         students = [
             {
                 "id": s.id,
@@ -382,16 +507,10 @@ class StudentViewSet(viewsets.ModelViewSet):
                 "student_id": s.student_id,
                 "email": s.email,
                 "cohort": s.cohort,
-                "on_my_list": s.id in on_my_list_ids,
             }
-            for s in students_qs
+            for s in students_qs.order_by("last_name", "first_name")
         ]
-
-        return Response({
-            "students": students,
-            "cohorts": cohorts,
-            "last_synced": self._last_synced(),
-        })
+        return {"students": students, "cohorts": cohorts}
 
     @staticmethod
     def _last_synced():
@@ -438,7 +557,8 @@ class StudentViewSet(viewsets.ModelViewSet):
         Body: {"student_ids": [1, 2], "cohort": "28"}  (either or both)
 
         Creates or reactivates TeacherStudent rows for the teacher. Annotations
-        are left blank - never copied from another teacher. Idempotent.
+        are left blank - never copied from another teacher. Idempotent, and a
+        fixed handful of queries however large the cohort.
 
         Response: {added, reactivated, already_on_list}
         """
@@ -449,19 +569,32 @@ class StudentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        added = reactivated = already = 0
-        for student in students:
-            ts, created = TeacherStudent.objects.get_or_create(
-                teacher=request.user, student=student
+        from django.db import transaction
+        from django.utils import timezone
+
+        student_ids = list(students.values_list("id", flat=True))
+        existing = dict(
+            TeacherStudent.objects.filter(
+                teacher=request.user, student_id__in=student_ids
+            ).values_list("student_id", "is_active")
+        )
+        new_ids = [sid for sid in student_ids if sid not in existing]
+        inactive_ids = [sid for sid, is_active in existing.items() if not is_active]
+
+        with transaction.atomic():
+            # ignore_conflicts covers a concurrent add of the same student
+            TeacherStudent.objects.bulk_create(
+                [TeacherStudent(teacher=request.user, student_id=sid) for sid in new_ids],
+                ignore_conflicts=True,
             )
-            if created:
-                added += 1
-            elif not ts.is_active:
-                ts.is_active = True
-                ts.save(update_fields=["is_active", "updated_at"])
-                reactivated += 1
-            else:
-                already += 1
+            if inactive_ids:
+                TeacherStudent.objects.filter(
+                    teacher=request.user, student_id__in=inactive_ids
+                ).update(is_active=True, updated_at=timezone.now())
+
+        added = len(new_ids)
+        reactivated = len(inactive_ids)
+        already = len(existing) - reactivated
 
         return Response(
             {
@@ -508,6 +641,9 @@ class StudentViewSet(viewsets.ModelViewSet):
 
         return Response({"removed": removed})
 
+    # The global school list is cached per data version (see school_list)
+    SCHOOL_LIST_CACHE_TIMEOUT = 60 * 60
+
     GENDER_MAP = {
         "m": "male", "male": "male",
         "f": "female", "female": "female",
@@ -533,12 +669,15 @@ class StudentViewSet(viewsets.ModelViewSet):
         gender - at least one identifier column required. Rows match by
         student_id first, then email (case-insensitive). Only non-empty cells
         change anything; a literal "-" in gender clears it to Not set.
-        apply=false is a dry run.
+        apply=false is a dry run. Lookups and writes are batched, so the
+        query count does not grow with the number of pasted rows.
 
         Response: {applied, updated: [{id, name, changes}], not_found,
                    invalid, unchanged, conflicts}
         """
         from django.db import transaction
+        from django.db.models.functions import Lower
+        from django.utils import timezone
 
         text = request.data.get("text") or ""
         apply_changes = bool(request.data.get("apply"))
@@ -567,29 +706,52 @@ class StudentViewSet(viewsets.ModelViewSet):
                 {"error": "Header must include a nickname or gender column."}, status=400
             )
 
-        updated, not_found, invalid, unchanged, conflicts = [], [], [], [], []
-        pending = []  # (student, changes)
-
+        rows = []  # (line_number, cells)
         for line_number, line in enumerate(lines[1:], start=2):
-            cells = [c.strip() for c in line.split(delimiter)]
+            rows.append((line_number, [c.strip() for c in line.split(delimiter)]))
+
+        def cell(cells, field):
+            idx = columns.get(field)
+            return cells[idx] if idx is not None and idx < len(cells) else ""
+
+        # Resolve every identifier in the paste up front: one IN query per
+        # identifier column, then the teacher's annotations for the matches.
+        row_ids = {cell(cells, "student_id") for _, cells in rows} - {""}
+        row_emails = {cell(cells, "email").lower() for _, cells in rows} - {""}
+        by_student_id = {
+            s.student_id: s for s in Student.objects.filter(student_id__in=row_ids)
+        } if row_ids else {}
+        by_email = {}
+        if row_emails:
+            # Several students can share an email; the lowest pk wins, as
+            # .first() did for the per-row lookup.
+            for s in (
+                Student.objects.annotate(email_lower=Lower("email"))
+                .filter(email_lower__in=row_emails)
+                .order_by("-pk")
+            ):
+                by_email[s.email_lower] = s
+        matched_ids = {s.id for s in by_student_id.values()} | {s.id for s in by_email.values()}
+        annotations = {
+            a.student_id: a
+            for a in TeacherStudent.objects.filter(
+                teacher=request.user, student_id__in=matched_ids
+            )
+        }
 
-            def cell(field):
-                idx = columns.get(field)
-                return cells[idx] if idx is not None and idx < len(cells) else ""
+        updated, not_found, invalid, unchanged, conflicts = [], [], [], [], []
+        pending = {}  # student.id -> (student, merged field values)
 
-            row_student_id = cell("student_id")
-            row_email = cell("email")
+        for line_number, cells in rows:
+            row_student_id = cell(cells, "student_id")
+            row_email = cell(cells, "email")
             if not row_student_id and not row_email:
                 invalid.append({"line": line_number, "reason": "No student_id or email in row"})
                 continue
 
             # Match by student_id first, then email
-            student = None
-            if row_student_id:
-                student = Student.objects.filter(student_id=row_student_id).first()
-            email_match = (
-                Student.objects.filter(email__iexact=row_email).first() if row_email else None
-            )
+            student = by_student_id.get(row_student_id) if row_student_id else None
+            email_match = by_email.get(row_email.lower()) if row_email else None
             if student is None:
                 student = email_match
             elif email_match and email_match.id != student.id:
@@ -612,9 +774,7 @@ class StudentViewSet(viewsets.ModelViewSet):
             # write to the requesting teacher's TeacherStudent row. The current
             # nickname is the annotation's value if set, else the student's
             # first name (the display fallback).
-            annotation = TeacherStudent.objects.filter(
-                teacher=request.user, student=student
-            ).first()
+            annotation = annotations.get(student.id)
             current_nickname = (
                 annotation.nickname
                 if annotation and annotation.nickname and annotation.nickname.strip()
@@ -623,11 +783,11 @@ class StudentViewSet(viewsets.ModelViewSet):
             current_gender = annotation.gender if annotation else None
 
             changes = {}
-            nickname = cell("nickname")
+            nickname = cell(cells, "nickname")
             if nickname and nickname != current_nickname:
                 changes["nickname"] = {"from": current_nickname, "to": nickname[:30]}
 
-            raw_gender = cell("gender")
+            raw_gender = cell(cells, "gender")
             if raw_gender:
                 if raw_gender.lower() not in self.GENDER_MAP:
                     invalid.append({
@@ -644,20 +804,30 @@ class StudentViewSet(viewsets.ModelViewSet):
                 unchanged.append(name)
                 continue
 
-            pending.append((student, changes))
+            # Repeated rows for one student merge, later rows winning per field
+            values = pending.setdefault(student.id, (student, {}))[1]
+            values.update({field: change["to"] for field, change in changes.items()})
             updated.append({"id": student.id, "name": name, "changes": changes})
 
         if apply_changes and pending:
-            with transaction.atomic():
-                for student, changes in pending:
-                    defaults = {}
-                    if "nickname" in changes:
-                        defaults["nickname"] = changes["nickname"]["to"]
-                    if "gender" in changes:
-                        defaults["gender"] = changes["gender"]["to"]
-                    TeacherStudent.objects.update_or_create(
-                        teacher=request.user, student=student, defaults=defaults
+            now = timezone.now()
+            to_update, to_create = [], []
+            for student_pk, (student, values) in pending.items():
+                annotation = annotations.get(student_pk)
+                if annotation is None:
+                    to_create.append(
+                        TeacherStudent(teacher=request.user, student=student, **values)
                     )
+                    continue
+                for field, value in values.items():
+                    setattr(annotation, field, value)
+                annotation.updated_at = now  # bulk_update skips auto_now
+                to_update.append(annotation)
+            with transaction.atomic():
+                TeacherStudent.objects.bulk_update(
+                    to_update, ["nickname", "gender", "updated_at"]
+                )
+                TeacherStudent.objects.bulk_create(to_create)
 
         return Response({
             "applied": apply_changes,
@@ -669,32 +839,7 @@ class StudentViewSet(viewsets.ModelViewSet):
         })
 
 
-def derive_partner_signal(pref_ab, pref_ba):
-    """Derive a symmetric pairing signal for one unordered student pair (A, B).
-
-    ``pref_ab`` is A's self-reported preference about B (+1 / -1 / None-if-absent);
-    ``pref_ba`` is B's preference about A. Returns one of:
-
-        +2  both chose +1 (strong pair)
-        +1  exactly one chose +1, the other is absent (good pair)
-        -1  any -1 present (do-not-pair / avoid) - this DOMINATES a +1
-        None  neither expressed anything
-
-    Note the derived signal is CAPPED at -1: student input can never produce a
-    hard -2 ("Never Together"), which stays teacher-only. See GH issue #16 ph3.
-    """
-    has_negative = pref_ab == -1 or pref_ba == -1
-    if has_negative:
-        return -1
-    positives = (1 if pref_ab == 1 else 0) + (1 if pref_ba == 1 else 0)
-    if positives == 2:
-        return 2
-    if positives == 1:
-        return 1
-    return None
-
-
-class ClassViewSet(viewsets.ModelViewSet):
+class ClassViewSet(FieldSelectionMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing classes.
     
@@ -718,6 +863,14 @@ class ClassViewSet(viewsets.ModelViewSet):
         - description: Additional class description
         - classroom_layout: FK to ClassroomLayout for seating arrangement
     
+    Detail field selection (GET /api/classes/{id}/):
+        - Default: every field, including roster, current_seating_period and
+          seating_periods
+        - ?fields=id,name,... - only those fields
+        - ?expand=roster - plain fields plus only the roster (likewise
+          current_seating_period, seating_periods); an empty ?expand= skips
+          all three
+
     Special Behaviors:
         - Roster automatically filtered to show only active students (is_active=True)
         - Deleting a class cascades to all related seating periods and assignments
@@ -726,6 +879,16 @@ class ClassViewSet(viewsets.ModelViewSet):
     queryset = Class.objects.all()
     serializer_class = ClassSerializer
     permission_classes = [IsTeacher]
+    # The roster is built by ClassSerializer.get_roster with its own
+    # prefetches; only the nested seating periods need queryset prefetching.
+    expansion_prefetches = {
+        "seating_periods": (
+            "seating_periods__layout__created_by",
+            "seating_periods__layout__tables__seats",
+            "seating_periods__layout__obstacles",
+            "seating_periods__seating_assignments__roster_entry__student",
+        ),
+    }
 
     def get_serializer_class(self):
         """Use lightweight serializer for list view"""
@@ -764,15 +927,14 @@ class ClassViewSet(viewsets.ModelViewSet):
                 ),
             )
 
-        # For detail/other actions, prefetch related data
-        return base_qs.select_related(
-            'teacher',
-            'classroom_layout',
-        ).prefetch_related(
-            'roster__student',
-            'seating_periods__layout',
-            'seating_periods__seating_assignments__roster_entry__student',
-        )
+        base_qs = base_qs.select_related('teacher', 'classroom_layout')
+
+        # Only the standard detail actions serialize a ClassSerializer; the
+        # custom actions just use get_object() for the ownership check and
+        # run their own queries.
+        if self.action in ('retrieve', 'update', 'partial_update'):
+            return self.prefetch_expansions(base_qs)
+        return base_qs
     
     def perform_create(self, serializer):
         """Auto-set the teacher to the current user when creating a class"""
@@ -959,6 +1121,10 @@ class ClassViewSet(viewsets.ModelViewSet):
                 }
             }
         
+        GET ?sparse=1: Same keys, but grid, student_signals and effective_grid
+            are lists of [lo_id, hi_id, value] for non-zero pairs only (each
+            unordered pair once, lo_id < hi_id); absent pairs are 0.
+
         POST: Set single partnership rating
             Body: {
                 "student1_id": int,
@@ -976,193 +1142,28 @@ class ClassViewSet(viewsets.ModelViewSet):
         class_obj = self.get_object()
         
         if request.method == "GET":
-            # Get all active students in the class
-            roster_entries = ClassRoster.objects.filter(
-                class_assigned=class_obj,
-                is_active=True
-            ).select_related('student')
-            
-            students = [entry.student for entry in roster_entries]
-            student_ids = [s.id for s in students]
-            student_by_id = {s.id: s for s in students}
-
-            # Resolve nicknames through the class teacher's annotations (one
-            # query), falling back to first_name.
-            nickname_by_student = {
-                ts.student_id: ts.nickname
-                for ts in TeacherStudent.objects.filter(
-                    teacher=class_obj.teacher, student_id__in=student_ids
-                )
-                if ts.nickname and ts.nickname.strip()
-            }
-
-            # Get all existing ratings for this class
-            ratings = PartnershipRating.objects.filter(
-                class_assigned=class_obj,
-                student1__in=student_ids,
-                student2__in=student_ids
-            )
-
-            # Build lookup dict from fetched ratings (fixes N+1 query)
-            ratings_lookup = {}
-            for r in ratings:
-                key = (min(r.student1_id, r.student2_id), max(r.student1_id, r.student2_id))
-                ratings_lookup[key] = r.rating
-
-            # Build grid data structure
-            grid_data = {}
-            for s1 in students:
-                grid_data[s1.id] = {
-                    'student_name': f"{s1.first_name} {s1.last_name}",
-                    'ratings': {}
-                }
-                for s2 in students:
-                    if s1.id != s2.id:
-                        # Get rating from lookup (order-independent key)
-                        key = (min(s1.id, s2.id), max(s1.id, s2.id))
-                        rating_value = ratings_lookup.get(key, 0)
-                        grid_data[s1.id]['ratings'][s2.id] = rating_value
-
-            # --- Phase 3: derived student pairing signals + conflicts ---
-            # (GH issue #16). Derive a per-pair signal from THIS class's
-            # StudentPartnerPreference rows, surface teacher/student conflicts,
-            # and expose an effective_grid the seating tools should consume.
-            student_id_set = set(student_ids)
-
-            # Display name (nickname fallback to first_name) for detail strings.
-            def _disp(sid):
-                s = student_by_id.get(sid)
-                if not s:
-                    return "A student"
-                return nickname_by_student.get(sid) or s.first_name
-
-            # prefs[(chooser_id, target_id)] = preference (+1 / -1)
-            prefs = {}
-            for p in StudentPartnerPreference.objects.filter(
-                class_assigned=class_obj,
-                student_id__in=student_id_set,
-                target_id__in=student_id_set,
-            ):
-                prefs[(p.student_id, p.target_id)] = p.preference
-
-            # Symmetric signal map mirroring grid's "ratings" shape. Only pairs
-            # with a derived signal are emitted (both directions).
-            student_signals = {}
-            # signal_lookup[(lo, hi)] = derived signal for effective_grid merge.
-            signal_lookup = {}
-            conflicts = []
-            seen_pairs = set()
-
-            for a in student_ids:
-                for b in student_ids:
-                    if a >= b:
-                        continue
-                    pair = (a, b)
-                    if pair in seen_pairs:
-                        continue
-                    seen_pairs.add(pair)
-
-                    pref_ab = prefs.get((a, b))  # A chose about B
-                    pref_ba = prefs.get((b, a))  # B chose about A
-                    signal = derive_partner_signal(pref_ab, pref_ba)
-                    if signal is None:
-                        continue
-
-                    signal_lookup[pair] = signal
-                    student_signals.setdefault(a, {})[b] = signal
-                    student_signals.setdefault(b, {})[a] = signal
-
-                    # Conflict detection against the teacher rating.
-                    teacher_rating = ratings_lookup.get(pair, 0)
-
-                    # Who chose the other +1 (case a) / -1 (case b), by direction.
-                    chose_pos = []  # list of (chooser, other)
-                    if pref_ab == 1:
-                        chose_pos.append((a, b))
-                    if pref_ba == 1:
-                        chose_pos.append((b, a))
-                    chose_neg = []
-                    if pref_ab == -1:
-                        chose_neg.append((a, b))
-                    if pref_ba == -1:
-                        chose_neg.append((b, a))
-
-                    detail = None
-                    if teacher_rating in (-1, -2) and chose_pos:
-                        marker = (
-                            "Never Together" if teacher_rating == -2
-                            else "Avoid if Possible"
-                        )
-                        if len(chose_pos) == 2:
-                            phrase = (
-                                f"{_disp(a)} and {_disp(b)} chose each other "
-                                "as good partners"
-                            )
-                        else:
-                            chooser, other = chose_pos[0]
-                            phrase = (
-                                f"{_disp(chooser)} chose {_disp(other)} "
-                                "as a good partner"
-                            )
-                        detail = f"{phrase}, but you have them marked {marker}"
-                    elif teacher_rating == 2 and chose_neg:
-                        if len(chose_neg) == 2:
-                            phrase = (
-                                f"{_disp(a)} and {_disp(b)} both chose "
-                                "not to work together"
-                            )
-                        else:
-                            chooser, other = chose_neg[0]
-                            phrase = (
-                                f"{_disp(chooser)} chose not to work "
-                                f"with {_disp(other)}"
-                            )
-                        detail = (
-                            f"{phrase}, but you have them marked Best Partnership"
-                        )
-
-                    if detail:
-                        conflicts.append({
-                            'student1_id': a,
-                            'student2_id': b,
-                            'student1_name': f"{student_by_id[a].first_name} "
-                                             f"{student_by_id[a].last_name}",
-                            'student2_name': f"{student_by_id[b].first_name} "
-                                             f"{student_by_id[b].last_name}",
-                            'teacher_rating': teacher_rating,
-                            'student_signal': signal,
-                            'detail': detail,
-                        })
-
-            # effective_grid: teacher rating where non-zero, else derived
-            # student signal, else 0. Same nested shape as grid. Student signals
-            # are capped at -1, so a -2 here always originates from the teacher.
-            effective_grid = {}
-            for s1 in students:
-                effective_grid[s1.id] = {}
-                for s2 in students:
-                    if s1.id == s2.id:
-                        continue
-                    pair = (min(s1.id, s2.id), max(s1.id, s2.id))
-                    teacher_rating = ratings_lookup.get(pair, 0)
-                    if teacher_rating != 0:
-                        effective_grid[s1.id][s2.id] = teacher_rating
-                    else:
-                        effective_grid[s1.id][s2.id] = signal_lookup.get(pair, 0)
-
+            # Grid, derived student signals (GH issue #16 phase 3), conflicts
+            # and effective_grid all come from the engine, which rebuilds only
+            # when the roster, ratings, preferences or nicknames change.
+            engine = PairSignalEngine.for_class(class_obj)
+            if str(request.query_params.get("sparse", "")).lower() in ("1", "true", "yes"):
+                # Only non-zero pairs as [lo, hi, value]; every other pair is 0
+                return Response({
+                    'class_id': class_obj.id,
+                    'sparse': True,
+                    'students': engine.students,
+                    'grid': engine.triples(engine.ratings),
+                    'student_signals': engine.triples(engine.signals),
+                    'conflicts': engine.conflicts,
+                    'effective_grid': engine.triples(engine.effective),
+                })
             return Response({
                 'class_id': class_obj.id,
-                'students': [
-                    {
-                        'id': s.id,
-                        'name': f"{s.first_name} {s.last_name}",
-                        'nickname': nickname_by_student.get(s.id) or s.first_name
-                    } for s in students
-                ],
-                'grid': grid_data,
-                'student_signals': student_signals,
-                'conflicts': conflicts,
-                'effective_grid': effective_grid,
+                'students': engine.students,
+                'grid': engine.grid,
+                'student_signals': engine.student_signals,
+                'conflicts': engine.conflicts,
+                'effective_grid': engine.effective_grid,
             })
         
         elif request.method == "POST":
@@ -1217,6 +1218,20 @@ class ClassViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
     
+    @action(detail=True, methods=["get"], url_path="survey-analytics")
+    def survey_analytics(self, request, pk=None):
+        """
+        Popularity and reciprocity metrics from the student partner survey
+        (GH issue #16): in/out degree per student, most chosen / most avoided,
+        mutual positive and negative pairs, unreciprocated choices, and
+        students nobody chose positively. Teacher-only; cached until the
+        roster or preferences change.
+
+        GET /api/classes/{id}/survey-analytics/
+        """
+        class_obj = self.get_object()
+        return Response({"class_id": class_obj.id, **survey_analytics(class_obj)})
+
     @action(detail=True, methods=["post"], url_path="bulk-update-ratings")
     def bulk_update_ratings(self, request, pk=None):
         """
@@ -1239,12 +1254,16 @@ class ClassViewSet(viewsets.ModelViewSet):
         
         Returns:
             200: {
-                "message": "Updated N partnership ratings",
-                "updated_count": int
+                "updated": [{"student1_id", "student2_id", "rating"}, ...],
+                "errors": [{"student1_id", "student2_id", "error"}, ...],
+                "total_updated": int,
+                "total_errors": int
             }
             400: Validation errors
         
-        Note: Automatically handles student ID ordering (lower ID always student1)
+        Note: Automatically handles student ID ordering (lower ID always student1).
+        Valid pairs are written with one upsert, plus one delete for pairs
+        reset to 0 (neutral is the implied default).
         """
         class_obj = self.get_object()
         
@@ -1254,51 +1273,87 @@ class ClassViewSet(viewsets.ModelViewSet):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
+        from functools import reduce
+        from operator import or_
+
+        from django.db import transaction
+
         ratings_data = serializer.validated_data['ratings']
         updated_ratings = []
         errors = []
-        
+
+        def _error(rating_data, message):
+            errors.append({
+                'student1_id': rating_data.get('student1_id'),
+                'student2_id': rating_data.get('student2_id'),
+                'error': message,
+            })
+
+        # Two reads for the whole payload: which ids exist at all (to keep the
+        # "Invalid student ID" error distinct) and the active roster.
+        pairs = []
         for rating_data in ratings_data:
             try:
-                student1 = Student.objects.get(id=rating_data['student1_id'])
-                student2 = Student.objects.get(id=rating_data['student2_id'])
-                
-                # Verify both students are in this class
-                if not ClassRoster.objects.filter(
-                    class_assigned=class_obj,
-                    student__in=[student1, student2],
-                    is_active=True
-                ).count() == 2:
-                    errors.append({
-                        'student1_id': rating_data['student1_id'],
-                        'student2_id': rating_data['student2_id'],
-                        'error': 'One or both students not in class'
-                    })
-                    continue
-                
-                # Set the rating
-                rating_obj = PartnershipRating.set_rating(
-                    class_assigned=class_obj,
-                    student1=student1,
-                    student2=student2,
-                    rating=rating_data['rating'],
-                    created_by=request.user,
-                    notes=rating_data.get('notes', '')
+                pairs.append((int(rating_data['student1_id']), int(rating_data['student2_id'])))
+            except (TypeError, ValueError):
+                pairs.append(None)
+        requested_ids = {sid for pair in pairs if pair for sid in pair}
+        existing_ids = set(Student.objects.filter(id__in=requested_ids).values_list('id', flat=True))
+        roster_ids = set(
+            ClassRoster.objects.filter(
+                class_assigned=class_obj, is_active=True, student_id__in=requested_ids
+            ).values_list('student_id', flat=True)
+        )
+
+        # Normalize to (lo, hi); a pair rated twice keeps the last value.
+        final = {}
+        for rating_data, pair in zip(ratings_data, pairs):
+            if pair is None or not set(pair) <= existing_ids:
+                _error(rating_data, 'Invalid student ID')
+                continue
+            if not set(pair) <= roster_ids:
+                _error(rating_data, 'One or both students not in class')
+                continue
+            if pair[0] == pair[1]:
+                _error(rating_data, 'A student cannot be rated with themselves')
+                continue
+            lo, hi = min(pair), max(pair)
+            final[(lo, hi)] = (rating_data['rating'], rating_data.get('notes', ''))
+            updated_ratings.append({
+                'student1_id': lo,
+                'student2_id': hi,
+                'rating': rating_data['rating'],
+            })
+
+        # Neutral (0) is the implied default, so a reset deletes the row;
+        # everything else is one upsert.
+        upserts = [
+            PartnershipRating(
+                class_assigned=class_obj,
+                student1_id=lo,
+                student2_id=hi,
+                rating=rating,
+                created_by=request.user,
+                notes=notes,
+            )
+            for (lo, hi), (rating, notes) in final.items()
+            if rating != 0
+        ]
+        resets = [pair for pair, (rating, _notes) in final.items() if rating == 0]
+
+        with transaction.atomic():
+            if upserts:
+                PartnershipRating.objects.bulk_create(
+                    upserts,
+                    update_conflicts=True,
+                    unique_fields=['class_assigned', 'student1', 'student2'],
+                    update_fields=['rating', 'created_by', 'notes', 'updated_at'],
                 )
-                
-                updated_ratings.append({
-                    'student1_id': min(student1.id, student2.id),
-                    'student2_id': max(student1.id, student2.id),
-                    'rating': rating_obj.rating
-                })
-                
-            except Student.DoesNotExist:
-                errors.append({
-                    'student1_id': rating_data.get('student1_id'),
-                    'student2_id': rating_data.get('student2_id'),
-                    'error': 'Invalid student ID'
-                })
-        
+            if resets:
+                PartnershipRating.objects.filter(class_assigned=class_obj).filter(
+                    reduce(or_, (models.Q(student1_id=lo, student2_id=hi) for lo, hi in resets))
+                ).delete()
+
         return Response({
             'updated': updated_ratings,
             'errors': errors,
@@ -1399,36 +1454,98 @@ PARTNER_SURVEY_POSITIVE_CAP = 5
 PARTNER_SURVEY_NEGATIVE_CAP = 3
 
 
-def _survey_classmates(klass, student):
+# Cached ordered roster per class. Roster changes move the version key; the
+# timeout only bounds staleness for a corrected student name.
+SURVEY_ROSTER_CACHE_TIMEOUT = 60 * 10
+
+
+def _survey_class_for(student, class_id):
+    """
+    The class, if ``student`` is on its ACTIVE roster (else None), annotated
+    with its roster version - the roster gate and the cache key for
+    :func:`_survey_roster` in a single query.
+    """
+    def _roster_agg(aggregate):
+        return models.Subquery(
+            ClassRoster.objects.filter(class_assigned=models.OuterRef("pk"))
+            .order_by()
+            .values("class_assigned")
+            .annotate(value=aggregate)
+            .values("value")
+        )
+
+    return (
+        Class.objects.filter(pk=class_id)
+        .filter(
+            models.Exists(
+                ClassRoster.objects.filter(
+                    class_assigned=models.OuterRef("pk"), student=student, is_active=True
+                )
+            )
+        )
+        .annotate(
+            roster_rows=_roster_agg(models.Count("pk")),
+            roster_updated_at=_roster_agg(models.Max("updated_at")),
+        )
+        .first()
+    )
+
+
+def _survey_roster_version(klass):
+    """(row count, latest updated_at) over the class roster - moves on any roster change."""
+    if hasattr(klass, "roster_rows"):
+        rows, updated_at = klass.roster_rows, klass.roster_updated_at
+    else:
+        agg = klass.roster.aggregate(n=models.Count("pk"), ts=models.Max("updated_at"))
+        rows, updated_at = agg["n"], agg["ts"]
+    return (rows, updated_at.isoformat() if updated_at else None)
+
+
+def _survey_roster(klass, roster_version):
+    """Active roster of the class ordered by last then first name, cached per roster version."""
+    from django.core.cache import cache
+
+    key = f"survey-roster:{klass.id}:{roster_version[0]}:{roster_version[1]}"
+    roster = cache.get(key)
+    if roster is None:
+        roster = [
+            {"id": sid, "first_name": first_name, "last_name": last_name}
+            for sid, first_name, last_name in klass.roster.filter(is_active=True)
+            .order_by("student__last_name", "student__first_name")
+            .values_list("student_id", "student__first_name", "student__last_name")
+        ]
+        cache.set(key, roster, SURVEY_ROSTER_CACHE_TIMEOUT)
+    return roster
+
+
+def _survey_classmates(klass, student, roster_version=None):
     """Active roster minus the requester, ordered by last then first name.
 
     Uses the GLOBAL Student first/last name only - never teacher nicknames or
     any teacher rating data (those are the teacher's private annotations).
+    The ordered roster comes from the per-class cache; the requester is
+    filtered out in memory.
     """
-    rosters = (
-        klass.roster.filter(is_active=True)
-        .exclude(student_id=student.id)
-        .select_related("student")
-        .order_by("student__last_name", "student__first_name")
-    )
-    return [
-        {
-            "id": r.student.id,
-            "first_name": r.student.first_name,
-            "last_name": r.student.last_name,
-        }
-        for r in rosters
-    ]
+    if roster_version is None:
+        roster_version = _survey_roster_version(klass)
+    return [c for c in _survey_roster(klass, roster_version) if c["id"] != student.id]
 
 
-def _survey_open_payload(klass, student):
-    """The full "open" response shape shared by GET and a successful POST."""
-    choices = [
-        {"target_id": p.target_id, "preference": p.preference}
-        for p in StudentPartnerPreference.objects.filter(
-            class_assigned=klass, student=student
-        )
-    ]
+def _survey_open_payload(klass, student, classmates=None, choices=None):
+    """The full "open" response shape shared by GET and a successful POST.
+
+    A POST passes the classmates it validated against and the choices it
+    just wrote, so nothing is re-read.
+    """
+    if choices is None:
+        choices = [
+            {"target_id": p.target_id, "preference": p.preference}
+            for p in StudentPartnerPreference.objects.filter(
+                class_assigned=klass, student=student
+            )
+        ]
+    if classmates is None:
+        classmates = _survey_classmates(klass, student)
     return {
         "open": True,
         "class_name": klass.name,
@@ -1436,7 +1553,7 @@ def _survey_open_payload(klass, student):
             "positive": PARTNER_SURVEY_POSITIVE_CAP,
             "negative": PARTNER_SURVEY_NEGATIVE_CAP,
         },
-        "classmates": _survey_classmates(klass, student),
+        "classmates": classmates,
         "choices": choices,
     }
 
@@ -1473,18 +1590,13 @@ def my_partners(request, class_id):
     student = request.user.student
 
     # Roster gate: a non-member (or a nonexistent class) is indistinguishable -
-    # both yield 404 so we never leak that the class exists.
-    roster_entry = (
-        ClassRoster.objects.filter(
-            class_assigned_id=class_id, student=student, is_active=True
-        )
-        .select_related("class_assigned")
-        .first()
-    )
-    if roster_entry is None:
+    # both yield 404 so we never leak that the class exists. The same query
+    # carries the roster version, so a survey-open burst reads the ordered
+    # roster once per class (cached) instead of once per student.
+    klass = _survey_class_for(student, class_id)
+    if klass is None:
         return Response({"detail": "Not found."}, status=drf_status.HTTP_404_NOT_FOUND)
 
-    klass = roster_entry.class_assigned
     closed_reason = _survey_window_state(klass)
 
     if request.method == "GET":
@@ -1509,11 +1621,8 @@ def my_partners(request, class_id):
         )
 
     # Valid targets = active roster of this class, excluding the requester.
-    valid_target_ids = set(
-        klass.roster.filter(is_active=True)
-        .exclude(student_id=student.id)
-        .values_list("student_id", flat=True)
-    )
+    classmates = _survey_classmates(klass, student)
+    valid_target_ids = {c["id"] for c in classmates}
 
     cleaned = []
     seen_targets = set()
@@ -1568,19 +1677,38 @@ def my_partners(request, class_id):
     from django.db import transaction
 
     with transaction.atomic():
-        # Full-replace semantics: drop rows not in the payload, upsert the rest.
+        # Full-replace semantics: drop rows not in the payload, upsert the
+        # rest in a single statement.
         StudentPartnerPreference.objects.filter(
             class_assigned=klass, student=student
         ).exclude(target_id__in=seen_targets).delete()
-        for target_id, preference in cleaned:
-            StudentPartnerPreference.objects.update_or_create(
-                class_assigned=klass,
-                student=student,
-                target_id=target_id,
-                defaults={"preference": preference},
+        if cleaned:
+            StudentPartnerPreference.objects.bulk_create(
+                [
+                    StudentPartnerPreference(
+                        class_assigned=klass,
+                        student=student,
+                        target_id=target_id,
+                        preference=preference,
+                    )
+                    for target_id, preference in cleaned
+                ],
+                update_conflicts=True,
+                unique_fields=["class_assigned", "student", "target"],
+                update_fields=["preference", "updated_at"],
             )
 
-    return Response(_survey_open_payload(klass, student))
+    return Response(
+        _survey_open_payload(
+            klass,
+            student,
+            classmates=classmates,
+            choices=[
+                {"target_id": target_id, "preference": preference}
+                for target_id, preference in cleaned
+            ],
+        )
+    )
 
 
 # Layout ViewSets
@@ -1935,7 +2063,7 @@ class LayoutObstacleViewSet(viewsets.ModelViewSet):
 # Seating ViewSets
 
 
-class SeatingPeriodViewSet(viewsets.ModelViewSet):
+class SeatingPeriodViewSet(FieldSelectionMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing seating periods (time-bounded seating arrangements).
     
@@ -1952,6 +2080,12 @@ class SeatingPeriodViewSet(viewsets.ModelViewSet):
     Filtering:
         - ?class_assigned={id} - Filter by class ID
         - ?is_active={true/false} - Filter by active status (deprecated)
+
+    List expansion:
+        The list is slim by default (no nested assignments/groups/layout).
+        - ?expand=assignments - include seating_assignments and groups
+        - ?expand=layout - include layout_details
+        - ?expand=assignments,layout - both
     
     Required Fields:
         - class_assigned: FK to Class
@@ -1974,6 +2108,15 @@ class SeatingPeriodViewSet(viewsets.ModelViewSet):
     serializer_class = SeatingPeriodSerializer
     permission_classes = [IsTeacher]
     filterset_fields = ["class_assigned", "is_active"]  # Enable filtering
+    expansion_prefetches = {
+        "assignments": ("seating_assignments__roster_entry__student",),
+        "layout": ("layout__created_by", "layout__tables__seats", "layout__obstacles"),
+    }
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return SeatingPeriodListSerializer
+        return SeatingPeriodSerializer
 
     def get_queryset(self):
         """Filter periods to only show those for user's classes"""
@@ -1983,12 +2126,10 @@ class SeatingPeriodViewSet(viewsets.ModelViewSet):
         ).select_related(
             'class_assigned',
             'layout',
-            'layout__created_by',
-        ).prefetch_related(
-            'seating_assignments__roster_entry__student',
-            'layout__tables__seats',
-            'layout__obstacles',
         )
+        # The slim list only prefetches what ?expand= asked for; every other
+        # action serializes the full period.
+        queryset = self.prefetch_expansions(queryset)
 
         # Filter by class_assigned if provided in query params
         class_assigned = self.request.query_params.get("class_assigned", None)
@@ -2010,8 +2151,8 @@ class SeatingPeriodViewSet(viewsets.ModelViewSet):
             - 400 if period is already current
             - 403 if user doesn't own the class
         """
-        from datetime import date
-        
+        from django.db import transaction
+
         period = self.get_object()
         
         # Check if user owns the class
@@ -2029,24 +2170,17 @@ class SeatingPeriodViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Find and end any current tracked periods for this class
-        # (untracked one-off charts are left alone)
-        current_periods = SeatingPeriod.objects.filter(
-            class_assigned=period.class_assigned,
-            end_date__isnull=True,
-            is_tracked=True,
-        ).exclude(id=period.id)
+        with transaction.atomic():
+            # End any current tracked periods for this class in one UPDATE,
+            # in the same transaction that makes this period current
+            # (untracked one-off charts are left alone)
+            SeatingPeriod.end_current_periods(period.class_assigned_id, exclude_id=period.id)
 
-        today = date.today()
-        for current_period in current_periods:
-            current_period.end_date = today
-            current_period.save(update_fields=["end_date"])
-
-        # Make this period current by removing its end date.
-        # Promoting an untracked chart makes it a real tracked period.
-        period.end_date = None
-        period.is_tracked = True
-        period.save(update_fields=["end_date", "is_tracked"])
+            # Make this period current by removing its end date.
+            # Promoting an untracked chart makes it a real tracked period.
+            period.end_date = None
+            period.is_tracked = True
+            period.save(update_fields=["end_date", "is_tracked", "updated_at"])
         
         # Return updated period data
         serializer = self.get_serializer(period)
@@ -2119,6 +2253,148 @@ class SeatingPeriodViewSet(viewsets.ModelViewSet):
 
         return Response(data)
 
+    @action(detail=True, methods=["get"])
+    def snapshot(self, request, pk=None):
+        """
+        Frozen chart of an ended seating period.
+
+        Serves the stored SeatingPeriodSnapshot (layout geometry, seat map and
+        student display names) as-is: one row read and a decompress, no joins
+        and no re-serialization. A missing snapshot (older periods, or one
+        dropped after an assignment edit) is captured on first read.
+
+        GET /api/seating-periods/{id}/snapshot/
+
+        Returns:
+            200: {"period": {...}, "layout": {...}, "assignments": [...], "captured_at": ...}
+            400: the period has not ended yet
+            404: period not found / not one of the teacher's classes
+        """
+        snapshot = SeatingPeriodSnapshot.objects.filter(
+            seating_period_id=pk,
+            seating_period__class_assigned__teacher=request.user,
+        ).first()
+
+        if snapshot is None:
+            period = SeatingPeriod.objects.filter(
+                id=pk, class_assigned__teacher=request.user
+            ).select_related("class_assigned").first()
+            if period is None:
+                return Response({"error": "Seating period not found"}, status=status.HTTP_404_NOT_FOUND)
+            if period.end_date is None:
+                return Response(
+                    {"error": "Only ended seating periods have a snapshot"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            snapshot = SeatingPeriodSnapshot.capture(period)
+
+        return HttpResponse(snapshot.json_bytes, content_type="application/json")
+
+    @action(detail=True, methods=["get"])
+    def diff(self, request, pk=None):
+        """
+        Seat-level delta between this period and another one of the same class.
+
+        Replaces fetching both full nested periods and diffing client-side:
+        one query loads the two seat maps and only the changes come back.
+
+        GET /api/seating-periods/{id}/diff/?against={other_id}
+
+        Returns:
+            200: {
+                "period": id, "against": other_id,
+                "moved": [{"student_id", "name", "from_seat", "to_seat"}],
+                "added": [{"student_id", "name", "seat_id"}],    # only in {id}
+                "removed": [{"student_id", "name", "seat_id"}],  # only in other
+                "unchanged_count": <students in the same seat>,
+                "unchanged_table_mates": [{"student_ids": [a, b], "names": [..],
+                                           "from_table": t, "to_table": t}]
+            }
+            400: missing/invalid ?against, or periods from different classes
+            404: either period not found / not one of the teacher's classes
+        """
+        against_id = request.query_params.get("against")
+        if not against_id:
+            return Response({"error": "against parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            ids = {int(pk), int(against_id)}
+        except (TypeError, ValueError):
+            return Response({"error": "against must be a seating period id"}, status=status.HTTP_400_BAD_REQUEST)
+
+        periods = dict(
+            SeatingPeriod.objects.filter(id__in=ids, class_assigned__teacher=request.user).values_list(
+                "id", "class_assigned_id"
+            )
+        )
+        if len(periods) != len(ids):
+            return Response({"error": "Seating period not found"}, status=status.HTTP_404_NOT_FOUND)
+        if len(set(periods.values())) != 1:
+            return Response(
+                {"error": "Both periods must belong to the same class"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        period_id, against_id = int(pk), int(against_id)
+        seats = {period_id: {}, against_id: {}}
+        names = {}
+        rows = SeatingAssignment.objects.filter(seating_period_id__in=ids).values_list(
+            "seating_period_id",
+            "seat_id",
+            "roster_entry__student_id",
+            "roster_entry__student__first_name",
+            "roster_entry__student__last_name",
+        )
+        for seating_period_id, seat_id, student_id, first_name, last_name in rows:
+            seats[seating_period_id][student_id] = seat_id
+            names[student_id] = f"{first_name} {last_name}"
+
+        def _table(seat_id):
+            return int(seat_id.split("-")[0])
+
+        def _by_name(student_id):
+            return (names[student_id], student_id)
+
+        now, before = seats[period_id], seats[against_id]
+        kept = set(now) & set(before)
+        moved = [
+            {"student_id": sid, "name": names[sid], "from_seat": before[sid], "to_seat": now[sid]}
+            for sid in sorted(kept, key=_by_name)
+            if before[sid] != now[sid]
+        ]
+        added = [
+            {"student_id": sid, "name": names[sid], "seat_id": now[sid]}
+            for sid in sorted(set(now) - kept, key=_by_name)
+        ]
+        removed = [
+            {"student_id": sid, "name": names[sid], "seat_id": before[sid]}
+            for sid in sorted(set(before) - kept, key=_by_name)
+        ]
+
+        # Pairs who shared a table in both charts (table numbers may differ)
+        tables = {}
+        for sid in kept:
+            tables.setdefault((_table(before[sid]), _table(now[sid])), []).append(sid)
+        table_mates = []
+        for (from_table, to_table), members in sorted(tables.items()):
+            members.sort(key=_by_name)
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    table_mates.append({
+                        "student_ids": [a, b],
+                        "names": [names[a], names[b]],
+                        "from_table": from_table,
+                        "to_table": to_table,
+                    })
+
+        return Response({
+            "period": period_id,
+            "against": against_id,
+            "moved": moved,
+            "added": added,
+            "removed": removed,
+            "unchanged_count": len(kept) - len(moved),
+            "unchanged_table_mates": table_mates,
+        })
+
     @action(detail=False, methods=["post"], url_path="create-with-assignments")
     def create_with_assignments(self, request):
         """